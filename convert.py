@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午11:58
+@Author  : zxy
+@File    : convert.py
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.classes.catalog import gpsTime, gpsTimestamp
+from utils.classes.detrend import linearDetrend
+from utils.classes.exporter import SEPARATORS, exportFile
+from utils.classes.reader import DATReader, probeHeader
+
+FORMATS = list(SEPARATORS) + ['json', 'pickle', 'npy', 'dat', 'npz']  # 支持的导出格式
+
+"python convert.py D:/data -o D:/out -f npy --channels 1 100 --time 0 10 --detrend"
+
+
+def listFiles(directory: str, pattern: str, is_scouter: bool) -> Tuple[List[str], List[str]]:
+    """
+    列出文件夹中匹配的 .dat 文件，并以读取数据时相同的方式解析文件头
+    Args:
+        directory: 数据文件夹
+        pattern: 文件名通配符
+        is_scouter: 是否为 scouter 采集格式
+
+    Returns: 文件头有效的文件（按文件名排序），文件头无效的文件
+
+    """
+    names = sorted(name for name in os.listdir(directory)
+                   if fnmatch.fnmatch(name, pattern) and os.path.isfile(os.path.join(directory, name)))
+    files, invalid = [], []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            probeHeader(path, is_scouter)
+            files.append(path)
+        except (OSError, ValueError):
+            invalid.append(path)
+    return files, invalid
+
+
+def convertFile(file: str,
+                output: str,
+                fmt: str,
+                is_scouter: bool = False,
+                channels: slice = slice(None),
+                time_range: Optional[Tuple[float, float]] = None,
+                detrend: bool = False,
+                dtype: np.dtype = np.float64,
+                use_sidecar: bool = False) -> Tuple[int, float]:
+    """
+    转换单个文件，在子进程中运行
+    不去趋势且数据类型与文件相同时直接从映射的文件导出，不读入整个文件
+    Args:
+        file: .dat 文件路径
+        output: 导出文件路径
+        fmt: 导出格式
+        is_scouter: 是否为 scouter 采集格式
+        channels: 通道范围（从 0 开始，可带步长）
+        time_range: 文件内的起止时间，秒，默认为整个文件
+        detrend: 是否去趋势
+        dtype: 数据类型
+        use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+
+    Returns: 读取的字节数，耗时，秒
+
+    """
+    start_time = time.perf_counter()
+    reader = DATReader(file, is_scouter, use_sidecar)
+    samples = slice(None)
+    if time_range is not None:
+        samples = slice(round(time_range[0] * reader.sampling_rate), round(time_range[1] * reader.sampling_rate))
+    data = reader.read(channels)[:, samples]
+    if data.size == 0:
+        raise ValueError('选定的通道或时间范围内没有数据')
+    read_bytes = data.size * data.itemsize
+
+    data = data.astype(dtype, copy=detrend)  # 去趋势时原地修改，必须复制
+    if detrend:
+        linearDetrend(data)
+
+    first = samples.indices(reader.sampling_times)[0]
+    start = gpsTime(gpsTimestamp(reader.time) + first / reader.sampling_rate)
+    if not exportFile(data, output, fmt, time=start, sampling_rate=reader.sampling_rate):
+        raise RuntimeError('导出被取消')
+    return read_bytes, time.perf_counter() - start_time
+
+
+def parseArgs(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析命令行参数
+    Args:
+        argv: 命令行参数，默认为 sys.argv[1:]
+
+    Returns: 参数
+
+    """
+    parser = argparse.ArgumentParser(description='批量转换文件夹中的 .dat 文件，不需要图形界面')
+    parser.add_argument('directory', help='数据文件夹')
+    parser.add_argument('-g', '--glob', default='*.dat', help='文件名通配符，默认为 *.dat')
+    parser.add_argument('-o', '--output', help='导出文件夹，默认为数据文件夹下的 converted')
+    parser.add_argument('-f', '--format', default='npy', choices=FORMATS, help='导出格式，默认为 npy')
+    parser.add_argument('--scouter', action='store_true', help='scouter 采集格式')
+    parser.add_argument('--sidecar', action='store_true', help='scouter 格式时优先读取按通道存储的缓存')
+    parser.add_argument('--channels', nargs='+', type=int, metavar='N',
+                        help='通道范围：起始通道 终止通道 [步长]，从 1 开始且包含终止通道')
+    parser.add_argument('--time', nargs=2, type=float, metavar=('FROM', 'TO'), help='文件内的起止时间，秒')
+    parser.add_argument('--detrend', action='store_true', help='逐个文件去趋势')
+    parser.add_argument('--float32', action='store_true', help='以 float32 计算与导出，默认为 float64')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='进程数，默认为 CPU 核数')
+    args = parser.parse_args(argv)
+
+    if args.channels is not None:
+        if len(args.channels) not in (2, 3) or args.channels[0] < 1 or args.channels[1] < args.channels[0] or \
+                (len(args.channels) == 3 and args.channels[2] < 1):
+            parser.error('通道范围应为：起始通道 终止通道 [步长]，且 1 <= 起始通道 <= 终止通道，步长 >= 1')
+    if args.time is not None and not 0 <= args.time[0] < args.time[1]:
+        parser.error('时间范围应满足 0 <= FROM < TO')
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+    Args:
+        argv: 命令行参数，默认为 sys.argv[1:]
+
+    Returns: 退出码，有文件转换失败时为 1
+
+    """
+    args = parseArgs(argv)
+    files, invalid = listFiles(args.directory, args.glob, args.scouter)
+    for file in invalid:
+        print(f'跳过：{os.path.basename(file)}，文件头无法读取', file=sys.stderr)
+    if not files:
+        print('没有可转换的文件', file=sys.stderr)
+        return 1
+
+    output = args.output or os.path.join(args.directory, 'converted')
+    os.makedirs(output, exist_ok=True)
+    channels = slice(None) if args.channels is None else \
+        slice(args.channels[0] - 1, args.channels[1], args.channels[2] if len(args.channels) == 3 else 1)
+    dtype = np.float32 if args.float32 else np.float64
+
+    # 导出文件会替换同名文件，导出到数据文件夹且格式为 dat 时会覆盖仍被子进程映射的源文件，跳过这些文件
+    outputs = {file: os.path.join(output, f'{os.path.splitext(os.path.basename(file))[0]}.{args.format}')
+               for file in files}
+    sources = {os.path.realpath(file) for file in files}
+    jobs = []
+    for file in files:
+        if os.path.realpath(outputs[file]) in sources:
+            print(f'跳过：{os.path.basename(file)}，导出文件会覆盖数据文件，请选择其他导出文件夹', file=sys.stderr)
+        else:
+            jobs.append(file)
+    failed = len(files) - len(jobs)
+
+    total_bytes = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(convertFile,
+                                   file,
+                                   outputs[file],
+                                   args.format,
+                                   args.scouter,
+                                   channels,
+                                   args.time,
+                                   args.detrend,
+                                   dtype,
+                                   args.sidecar): file for file in jobs}
+        for i, future in enumerate(as_completed(futures), 1):
+            name = os.path.basename(futures[future])
+            try:
+                read_bytes, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                print(f'[{i}/{len(jobs)}] {name} 失败：{e}', file=sys.stderr)
+                continue
+            total_bytes += read_bytes
+            print(f'[{i}/{len(jobs)}] {name} {read_bytes / 1024 ** 2:.1f}MB {seconds:.2f}s')
+
+    elapsed = time.perf_counter() - start_time
+    print(f'完成 {len(files) - failed}/{len(files)} 个文件，共 {total_bytes / 1024 ** 2:.1f}MB，'
+          f'耗时 {elapsed:.2f}s，{total_bytes / 1024 ** 2 / max(elapsed, 1e-9):.1f}MB/s，'
+          f'{(len(files) - failed) / max(elapsed, 1e-9):.2f} 个文件/s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
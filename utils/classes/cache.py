@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 上午11:05
+@Author  : zxy
+@File    : cache.py
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class DecodeCache:
+    """已解码（去趋势）文件数据的缓存，超出内存上限时淘汰最近最少使用的文件"""
+
+    def __init__(self, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Args:
+            max_bytes: 缓存占用内存上限，字节
+
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0  # 当前占用内存，字节
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(file: str, is_scouter: bool, channels: slice, dtype: np.dtype) -> Tuple:
+        """
+        生成缓存键，文件修改后键随之改变
+        Args:
+            file: 文件路径
+            is_scouter: 是否为 scouter 采集格式
+            channels: 读取的通道范围
+            dtype: 数据类型
+
+        Returns: 缓存键
+
+        """
+        stat = os.stat(file)
+        return (os.path.abspath(file), stat.st_mtime, stat.st_size, bool(is_scouter),
+                (channels.start, channels.stop, channels.step), np.dtype(dtype).str)
+
+    def get(self, key: Tuple) -> Optional[np.array]:
+        """
+        读取缓存，命中时标记为最近使用
+        Args:
+            key: 缓存键
+
+        Returns: 缓存的数据，未命中返回 None
+
+        """
+        with self.lock:
+            data = self.items.get(key)
+            if data is not None:
+                self.items.move_to_end(key)
+            return data
+
+    def put(self, key: Tuple, data: np.array) -> None:
+        """
+        写入缓存，超出上限时淘汰最久未使用的数据
+        Args:
+            key: 缓存键
+            data: 数据
+
+        Returns:
+
+        """
+        if data.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.items:
+                self.nbytes -= self.items.pop(key).nbytes
+            self.items[key] = data
+            self.nbytes += data.nbytes
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        淘汰数据直至不超过内存上限，需在持有锁时调用
+        Returns:
+
+        """
+        while self.nbytes > self.max_bytes and self.items:
+            self.nbytes -= self.items.popitem(last=False)[1].nbytes
+
+    def makeRoom(self, nbytes: int, keep: Iterable[str]) -> bool:
+        """
+        为 nbytes 字节的新数据腾出空间，按最近最少使用的顺序淘汰不属于 keep 中文件的数据
+        Args:
+            nbytes: 需要的字节数
+            keep: 不淘汰的文件路径
+
+        Returns: 是否有足够的空间
+
+        """
+        keep = {os.path.abspath(file) for file in keep}
+        with self.lock:
+            for key in list(self.items):
+                if self.nbytes + nbytes <= self.max_bytes:
+                    break
+                if key[0] not in keep:
+                    self.nbytes -= self.items.pop(key).nbytes
+            return self.nbytes + nbytes <= self.max_bytes
+
+    def setMaxBytes(self, max_bytes: int) -> None:
+        """
+        修改内存上限
+        Args:
+            max_bytes: 缓存占用内存上限，字节
+
+        Returns:
+
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        Returns:
+
+        """
+        with self.lock:
+            self.items.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key: Tuple) -> bool:
+        with self.lock:
+            return key in self.items
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午5:02
+@Author  : zxy
+@File    : catalog.py
+"""
+import calendar
+import datetime
+import math
+import os
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .reader import probeHeader
+
+CATALOG = '.das_catalog.sqlite'  # 文件夹目录索引，位于数据文件夹下
+SCHEMA_VERSION = 2  # 索引表结构版本，不一致时重建索引
+TIME_COLUMNS = ['year', 'month', 'day', 'hour', 'minute', 'second']  # GPS时间的 6 列
+INFO_COLUMNS = 'name, valid, year, month, day, hour, minute, second, start, sampling_rate, channels_num, ' \
+               'sampling_times, sampling_time, acquisition_mode'  # 查询文件信息的列
+
+
+def gpsTimestamp(time: np.array) -> Optional[float]:
+    """
+    GPS时间转时间戳
+    Args:
+        time: 文件头中的 6 个GPS时间值（年、月、日、时、分、秒）
+
+    Returns: 秒为单位的时间戳，时间无效时返回 None
+
+    """
+    try:
+        return calendar.timegm((int(time[0]), int(time[1]), int(time[2]), int(time[3]), int(time[4]), 0)) + \
+            float(time[5])
+    except (ValueError, OverflowError):
+        return None
+
+
+def gpsTime(timestamp: float) -> np.array:
+    """
+    时间戳转GPS时间
+    Args:
+        timestamp: 秒为单位的时间戳
+
+    Returns: 6 个GPS时间值（年、月、日、时、分、秒），与文件头相同
+
+    """
+    seconds = math.floor(timestamp)
+    t = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+    return np.array([t.year, t.month, t.day, t.hour, t.minute, t.second + timestamp - seconds], dtype=np.float32)
+
+
+def parseGPSTime(text: str) -> float:
+    """
+    GPS时间字符串转时间戳
+    Args:
+        text: 年、月、日、时、分、秒，以任意非数字字符分隔，如 formatGPSTime 的输出
+
+    Returns: 秒为单位的时间戳
+
+    """
+    values = re.findall(r'[0-9]+(?:\.[0-9]*)?', text)
+    timestamp = gpsTimestamp([float(value) for value in values]) if len(values) == 6 else None
+    if timestamp is None:
+        raise ValueError(f'无法识别的GPS时间：{text}')
+    return timestamp
+
+
+class Catalog:
+    """
+    文件夹中 .dat 文件头信息的 SQLite 索引
+    刷新时只重新读取修改时间或大小改变的文件，文件列表与按时间查询都直接从索引读取
+    """
+
+    def __init__(self, directory: str):
+        """
+        打开或创建索引，文件夹不可写时使用内存中的索引
+        Args:
+            directory: 数据文件夹
+
+        """
+        self.directory = directory
+        try:
+            self.connection = sqlite3.connect(os.path.join(directory, CATALOG))
+            self.createTable()
+        except sqlite3.Error:
+            self.connection = sqlite3.connect(':memory:')
+            self.createTable()
+
+    def createTable(self) -> None:
+        """
+        创建索引表，旧版本的索引表直接删除重建
+        Returns:
+
+        """
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT NOT NULL,
+                is_scouter INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                valid INTEGER NOT NULL,
+                year REAL,
+                month REAL,
+                day REAL,
+                hour REAL,
+                minute REAL,
+                second REAL,
+                start REAL,
+                sampling_rate INTEGER,
+                channels_num INTEGER,
+                sampling_times INTEGER,
+                sampling_time REAL,
+                acquisition_mode TEXT,
+                PRIMARY KEY (is_scouter, name)
+            )''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS files_start ON files (is_scouter, start)')
+        self.connection.commit()
+
+    def refresh(self, is_scouter: bool = False) -> None:
+        """
+        增量刷新索引：新增或修改的文件重新读取文件头，已删除的文件从索引移除
+        Args:
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns:
+
+        """
+        is_scouter = int(bool(is_scouter))
+        indexed = {name: (mtime, size) for name, mtime, size in self.connection.execute(
+            'SELECT name, mtime, size FROM files WHERE is_scouter = ?', (is_scouter,))}
+
+        names, rows = set(), []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.dat') or not entry.is_file():
+                    continue
+                names.add(entry.name)
+                stat = entry.stat()
+                if indexed.get(entry.name) == (stat.st_mtime, stat.st_size):
+                    continue
+                rows.append(self.probe(entry.path, entry.name, is_scouter, stat))
+
+        removed = [(name, is_scouter) for name in indexed if name not in names]
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE name = ? AND is_scouter = ?', removed)
+            self.connection.executemany(f'INSERT OR REPLACE INTO files VALUES ({", ".join(["?"] * 17)})', rows)
+
+    def add(self, names: List[str], is_scouter: bool = False) -> List[Dict]:
+        """
+        只读取给出的文件的文件头并写入索引，不扫描整个文件夹，用于实时跟踪时加入新文件
+        Args:
+            names: 文件名
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns: 这些文件的信息，顺序与 names 相同，已不存在的文件被跳过
+
+        """
+        is_scouter = int(bool(is_scouter))
+        rows = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                rows.append(self.probe(path, name, is_scouter, os.stat(path)))
+            except OSError:
+                continue
+        with self.connection:
+            self.connection.executemany(f'INSERT OR REPLACE INTO files VALUES ({", ".join(["?"] * 17)})', rows)
+        return self.toInfos([(row[0],) + row[4:] for row in rows])  # 去掉 is_scouter、mtime、size 列
+
+    def remove(self, names: List[str], is_scouter: bool = False) -> None:
+        """
+        从索引中移除给出的文件，不扫描整个文件夹
+        Args:
+            names: 文件名
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns:
+
+        """
+        is_scouter = int(bool(is_scouter))
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE name = ? AND is_scouter = ?',
+                                        [(name, is_scouter) for name in names])
+
+    @staticmethod
+    def probe(path: str, name: str, is_scouter: int, stat: os.stat_result) -> tuple:
+        """
+        读取文件头，生成索引行
+        Args:
+            path: 文件路径
+            name: 文件名
+            is_scouter: 是否为 scouter 采集格式
+            stat: 文件状态
+
+        Returns: 索引行，文件头无法读取时除文件名等外均为空
+
+        """
+        try:
+            info = probeHeader(path, bool(is_scouter))
+        except (OSError, ValueError):
+            return (name, is_scouter, stat.st_mtime, stat.st_size, 0) + (None,) * 12
+        return (name, is_scouter, stat.st_mtime, stat.st_size, 1,
+                *info['time'].tolist(), gpsTimestamp(info['time']),
+                info['sampling_rate'], info['channels_num'], info['sampling_times'], info['sampling_time'],
+                info['acquisition_mode'])
+
+    @staticmethod
+    def toInfos(rows: List[tuple]) -> List[Dict]:
+        """
+        索引行转文件信息，所有行的GPS时间一次性转为数组，不逐行解析
+        Args:
+            rows: 按 INFO_COLUMNS 查询的索引行
+
+        Returns: 文件信息，键与 probeHeader 相同，另有文件名 name 与起始时间戳 start，文件头无法读取时 valid 为 False
+
+        """
+        times = np.array([row[2:8] for row in rows], dtype=np.float32).reshape(-1, 6)  # 无效文件为 nan
+        return [{
+            'name': name,
+            'valid': bool(valid),
+            'time': times[i] if valid else None,
+            'start': start,
+            'sampling_rate': sampling_rate,
+            'channels_num': channels_num,
+            'sampling_times': sampling_times,
+            'sampling_time': sampling_time,
+            'acquisition_mode': acquisition_mode
+        } for i, (name, valid, *_, start, sampling_rate, channels_num, sampling_times, sampling_time, acquisition_mode)
+            in enumerate(rows)]
+
+    def files(self, is_scouter: bool = False) -> List[Dict]:
+        """
+        索引中的所有文件，按文件名排序
+        Args:
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns: 文件信息
+
+        """
+        cursor = self.connection.execute(f'SELECT {INFO_COLUMNS} FROM files WHERE is_scouter = ? ORDER BY name',
+                                         (int(bool(is_scouter)),))
+        return self.toInfos(cursor.fetchall())
+
+    def lookup(self, names: List[str], is_scouter: bool = False) -> List[Dict]:
+        """
+        按文件名查询索引，不读取文件头
+        Args:
+            names: 文件名
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns: 文件信息，顺序与 names 相同，不在索引中的文件被跳过
+
+        """
+        is_scouter = int(bool(is_scouter))
+        rows = [self.connection.execute(f'SELECT {INFO_COLUMNS} FROM files WHERE is_scouter = ? AND name = ?',
+                                        (is_scouter, name)).fetchone() for name in names]
+        return self.toInfos([row for row in rows if row is not None])
+
+    def query(self, start: float, stop: float, is_scouter: bool = False) -> List[Dict]:
+        """
+        查询与时间范围相交的文件
+        Args:
+            start: 起始时间戳
+            stop: 终止时间戳
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns: 文件信息，按起始时间排序
+
+        """
+        is_scouter = int(bool(is_scouter))
+        longest = self.connection.execute('SELECT MAX(sampling_time) FROM files WHERE is_scouter = ?',
+                                          (is_scouter,)).fetchone()[0] or 0.
+        cursor = self.connection.execute(
+            f'SELECT {INFO_COLUMNS} FROM files WHERE is_scouter = ? AND valid = 1 AND start < ? AND start > ? '
+            'AND start + sampling_time > ? ORDER BY start', (is_scouter, stop, start - longest, start))  # 先按索引缩小范围
+        return self.toInfos(cursor.fetchall())
+
+    def locate(self, start: float, stop: float, is_scouter: bool = False) -> List[Tuple[Dict, slice]]:
+        """
+        由文件头中的GPS时间计算覆盖时间范围的文件及各文件中的采样点范围
+        Args:
+            start: 起始时间戳
+            stop: 终止时间戳
+            is_scouter: 是否为 scouter 采集格式
+
+        Returns: （文件信息，采样点范围）列表，按起始时间排序
+
+        """
+        segments = []
+        for info in self.query(start, stop, is_scouter):
+            rate, n = info['sampling_rate'], info['sampling_times']
+            a = min(max(math.ceil((start - info['start']) * rate - 1e-6), 0), n)  # 容许浮点误差
+            b = min(max(math.ceil((stop - info['start']) * rate - 1e-6), 0), n)
+            if a < b:
+                segments.append((info, slice(a, b)))
+        return segments
+
+    def close(self) -> None:
+        """
+        关闭索引
+        Returns:
+
+        """
+        self.connection.close()
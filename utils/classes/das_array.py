@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午10:05
+@Author  : zxy
+@File    : das_array.py
+"""
+import copy
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .detrend import centeredTime, fitLine
+from .reader import DATReader
+
+
+class DASArray:
+    """
+    由多个 .dat 文件按时间顺序拼接而成的惰性（通道数，采样次数）数组
+    用切片索引得到的仍是惰性数组（与 numpy 的视图相同），含整数索引或转换为 np.array 时才读取，且只读取被索引的部分；
+    去趋势按文件进行，各文件各通道的直线只在第一次读取该通道时计算一次，因此与逐个文件读取后去趋势的结果相同
+    """
+
+    def __init__(self,
+                 files: List[str],
+                 is_scouter: bool = False,
+                 channels: slice = slice(None),
+                 use_sidecar: bool = False,
+                 dtype: np.dtype = np.float32,
+                 detrend: bool = True,
+                 block_bytes: int = 32 * 1024 ** 2,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            files: 按时间顺序排列的 .dat 文件路径
+            is_scouter: 是否为 scouter 采集格式
+            channels: 文件中的通道范围（从 0 开始，可带步长）
+            use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+            dtype: 读取后的数据类型
+            detrend: 是否逐个文件去趋势
+            block_bytes: 计算去趋势直线时每次读取的字节数
+            max_workers: 线程数，默认由 ThreadPoolExecutor 决定
+
+        """
+        self.readers = [DATReader(file, is_scouter, use_sidecar) for file in files]
+        channels_num, sampling_rate = self.readers[0].channels_num, self.readers[0].sampling_rate
+        for reader in self.readers:
+            if reader.channels_num != channels_num or reader.sampling_rate != sampling_rate:
+                raise ValueError(f'{os.path.basename(reader.file)} 的采样率或通道数'
+                                 f'与 {os.path.basename(self.readers[0].file)} 不一致')
+
+        self.channel_index = np.arange(*channels.indices(channels_num))  # 各行对应的文件中的通道
+        self.offsets = np.cumsum([0] + [reader.sampling_times for reader in self.readers])  # 各文件的起始列
+        self.dtype = np.dtype(dtype)
+        self.detrend = detrend
+        self.block_bytes = block_bytes
+        self.max_workers = max_workers
+
+        # 以下对象由所有视图共享
+        self.lines = [{} for _ in self.readers]  # 各文件中各行的去趋势直线（均值，斜率）
+        self.lines_lock = threading.Lock()
+        self.overrides = {}  # 被赋值的行，整行保存
+
+        # 当前视图对应的行与采样点
+        self.rows = np.arange(len(self.channel_index))
+        self.samples = range(int(self.offsets[-1]))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """（通道数，采样次数）"""
+        return len(self.rows), len(self.samples)
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """全部读取后占用的内存，字节"""
+        return self.size * self.dtype.itemsize
+
+    @property
+    def T(self) -> np.array:
+        """读取全部数据并转置"""
+        return np.asarray(self).T
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy: Optional[bool] = None) -> np.array:
+        data = self.materialize(self.rows, self.samples)
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def view(self, channels: slice = slice(None), samples: slice = slice(None)) -> 'DASArray':
+        """
+        不读取数据的子数组
+        Args:
+            channels: 行范围
+            samples: 采样点范围
+
+        Returns: 惰性数组
+
+        """
+        view = copy.copy(self)
+        view.rows, view.samples = self.rows[channels], self.samples[samples]
+        return view
+
+    def index(self, key: Union[int, slice, tuple, list, np.ndarray]) -> Tuple[np.array, range, bool, bool, bool]:
+        """
+        解析索引
+        Args:
+            key: 行索引，或（行索引，采样点索引）
+
+        Returns: 被索引的行，采样点，两者是否都是切片，行与采样点是否为整数索引
+
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) == 1:
+            key = (key[0], slice(None))
+        if len(key) != 2:
+            raise IndexError(f'DASArray 为二维数组，索引数为 {len(key)}')
+        row_key, sample_key = key
+
+        row_int = isinstance(row_key, (int, np.integer))
+        if row_int:
+            rows = self.rows[[row_key]]
+        elif isinstance(row_key, slice):
+            rows = self.rows[row_key]
+        else:
+            rows = self.rows[np.asarray(row_key)]
+
+        sample_int = isinstance(sample_key, (int, np.integer))
+        if sample_int:
+            i = range(len(self.samples))[sample_key]  # 越界时抛出 IndexError
+            samples = self.samples[i:i + 1]
+        elif isinstance(sample_key, slice):
+            samples = self.samples[sample_key]
+        else:
+            raise IndexError('DASArray 的采样点只支持整数或切片索引')
+        return rows, samples, isinstance(row_key, slice) and isinstance(sample_key, slice), row_int, sample_int
+
+    def __getitem__(self, key: Union[int, slice, tuple]) -> Union['DASArray', np.array]:
+        rows, samples, lazy, row_int, sample_int = self.index(key)
+        if lazy:
+            view = copy.copy(self)
+            view.rows, view.samples = rows, samples
+            return view
+        data = self.materialize(rows, samples)
+        if row_int and sample_int:
+            return data[0, 0]
+        if row_int:
+            return data[0]
+        if sample_int:
+            return data[:, 0]
+        return data
+
+    def __setitem__(self, key: Union[int, slice, tuple], value: Union[np.array, float]) -> None:
+        """赋值的行整行保存在内存中，之后读取这些行时使用赋值后的数据"""
+        rows, samples, _, _, _ = self.index(key)
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), (len(rows), len(samples)))
+        if samples.step < 0:
+            samples, value = samples[::-1], value[:, ::-1]
+        for row, row_value in zip(rows, value):
+            if row not in self.overrides:
+                self.overrides[row] = self.materialize(np.array([row]), range(int(self.offsets[-1])))[0]
+            self.overrides[row][samples.start:samples.stop:samples.step] = row_value
+
+    def materialize(self, rows: np.array, samples: range) -> np.array:
+        """
+        读取数据，只读取与采样点范围相交的文件中的相应部分
+        Args:
+            rows: 行
+            samples: 采样点
+
+        Returns: （行数，采样点数）数据
+
+        """
+        if samples.step < 0:
+            return self.materialize(rows, samples[::-1])[:, ::-1]
+
+        data = np.empty((len(rows), len(samples)), dtype=self.dtype)
+        if not len(rows) or not len(samples):
+            return data
+
+        start, step = samples.start, samples.step
+        first = np.searchsorted(self.offsets, samples[0], side='right') - 1
+        last = np.searchsorted(self.offsets, samples[-1], side='right') - 1
+
+        def load(i: int) -> None:
+            offset, stop = self.offsets[i], self.offsets[i + 1]
+            k0 = max(math.ceil((offset - start) / step), 0)  # 该文件内第一个与最后一个采样点在结果中的位置
+            k1 = min(math.ceil((stop - start) / step), len(samples))
+            if k0 >= k1:
+                return
+            a = start + k0 * step - offset
+            local = slice(a, a + (k1 - k0 - 1) * step + 1, step)
+            block = self.readRows(i, rows, local)
+            if self.detrend:
+                mean, slope = self.line(i, rows)
+                t, _ = centeredTime(self.readers[i].sampling_times, self.dtype)
+                block -= mean
+                block -= slope * t[local]
+            data[:, k0:k1] = block
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(load, range(first, last + 1)))  # 取出结果以抛出线程中的错误
+
+        for j, row in enumerate(rows):
+            if row in self.overrides:
+                data[j] = self.overrides[row][samples.start:samples.stop:samples.step]
+        return data
+
+    def readRows(self, i: int, rows: np.array, samples: slice) -> np.array:
+        """
+        从第 i 个文件读取若干行的部分采样点，行等间隔时以切片读取
+        Args:
+            i: 文件序号
+            rows: 行
+            samples: 文件中的采样点范围
+
+        Returns: （行数，采样点数）数据
+
+        """
+        channels = self.channel_index[rows]
+        if len(channels) > 1 and np.all(np.diff(channels) == channels[1] - channels[0]) and channels[1] > channels[0]:
+            channels = slice(channels[0], channels[-1] + 1, channels[1] - channels[0])
+        elif len(channels) == 1:
+            channels = slice(channels[0], channels[0] + 1)
+        return self.readers[i].data[channels, samples].astype(self.dtype)
+
+    def line(self, i: int, rows: np.array) -> Tuple[np.array, np.array]:
+        """
+        第 i 个文件中各行的去趋势直线，尚未计算的行读取整行计算后保存
+        Args:
+            i: 文件序号
+            rows: 行
+
+        Returns: 均值与斜率，形状均为（行数，1）
+
+        """
+        lines = self.lines[i]
+        with self.lines_lock:
+            missing = np.array([row for row in dict.fromkeys(rows.tolist()) if row not in lines], dtype=int)
+        if len(missing):
+            n = self.readers[i].sampling_times
+            t, denominator = centeredTime(n, self.dtype)
+            step = max(self.block_bytes // max(n * self.dtype.itemsize, 1), 1)
+            for j in range(0, len(missing), step):
+                block_rows = missing[j:j + step]
+                mean, slope = fitLine(self.readRows(i, block_rows, slice(None)), t, denominator)
+                with self.lines_lock:
+                    lines.update(zip(block_rows.tolist(), zip(mean[:, 0], slope[:, 0])))
+        with self.lines_lock:
+            mean, slope = np.array([lines[row] for row in rows.tolist()], dtype=self.dtype).reshape(-1, 2).T
+        return mean[:, None], slope[:, None]
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/19 上午0:30
+@Author  : zxy
+@File    : decimation.py
+"""
+import math
+from typing import Tuple, Union
+
+import numpy as np
+
+from .das_array import DASArray
+
+
+class MinMaxPyramid:
+    """
+    曲线的最小值/最大值金字塔，用于按视图范围抽取绘图点，纵坐标为二维时每行为一条共用横坐标的曲线
+    第 k 层把每 factor^k 个采样点合并为一个区间并保存区间内的最小值与最大值，每个区间绘制两个点，因此任意缩放下峰值都不会丢失；
+    可见范围按像素宽度选择合适的层，范围外使用最粗的一层，使曲线的边界始终与完整数据相同；
+    纵坐标为惰性数组时分块读取建立，只保存占用内存不超过上限的较粗的层，较细的层显示时由可见范围的原始数据计算
+    """
+
+    def __init__(self,
+                 x: np.array,
+                 y: Union[np.array, DASArray],
+                 factor: int = 4,
+                 top_bins: int = 1024,
+                 max_bytes: int = 256 * 1024 ** 2,
+                 block_bytes: int = 64 * 1024 ** 2):
+        """
+        Args:
+            x: 单调递增的横坐标
+            y: 纵坐标，（采样点数，）或（曲线数，采样点数），也可以是惰性数组
+            factor: 相邻两层区间大小之比
+            top_bins: 最粗一层的区间数上限
+            max_bytes: 纵坐标为惰性数组时保存的层占用内存的上限
+            block_bytes: 纵坐标为惰性数组时每次读取的字节数
+
+        """
+        self.x = np.asarray(x)
+        self.y = y if isinstance(y, DASArray) else np.asarray(y)
+        self.factor = factor
+        n = self.y.shape[-1]
+        self.bin_sizes = [1]
+        while -(-n // self.bin_sizes[-1]) > top_bins:
+            self.bin_sizes.append(self.bin_sizes[-1] * factor)
+        self.mins = [self.y] + [None] * (len(self.bin_sizes) - 1)  # 第 0 层为原始数据，未保存的层为 None
+        self.maxs = self.mins[:]
+        if len(self.bin_sizes) == 1:
+            return
+
+        level = 1  # 第一个保存的层
+        if isinstance(self.y, DASArray):
+            rows, itemsize = self.y.shape[0], self.y.dtype.itemsize
+            while level < len(self.bin_sizes) - 1 and 2 * rows * -(-n // self.bin_sizes[level]) * itemsize > max_bytes:
+                level += 1
+            self.mins[level], self.maxs[level] = self.reduceLazy(self.bin_sizes[level], block_bytes)
+        else:
+            self.mins[level], self.maxs[level] = self.reduce(self.y, self.y, factor)
+        for level in range(level + 1, len(self.bin_sizes)):
+            self.mins[level], self.maxs[level] = self.reduce(self.mins[level - 1], self.maxs[level - 1], factor)
+
+    @staticmethod
+    def reduce(mins: np.array, maxs: np.array, size: int) -> Tuple[np.array, np.array]:
+        """
+        每 size 个点合并为一个区间
+        Args:
+            mins: 最小值
+            maxs: 最大值
+            size: 区间大小
+
+        Returns: 各区间的最小值，最大值（忽略 nan）
+
+        """
+        starts = np.arange(0, mins.shape[-1], size)
+        return np.fmin.reduceat(mins, starts, axis=-1), np.fmax.reduceat(maxs, starts, axis=-1)
+
+    def reduceLazy(self, size: int, block_bytes: int) -> Tuple[np.array, np.array]:
+        """
+        按（行，采样点）分块读取惰性数组，每 size 个点合并为一个区间，不读入完整数据
+        Args:
+            size: 区间大小
+            block_bytes: 每块的字节数
+
+        Returns: （行数，区间数）最小值，最大值
+
+        """
+        rows, n = self.y.shape
+        itemsize = self.y.dtype.itemsize
+        step_rows = max(min(block_bytes // max(n * itemsize, 1), rows), 1)
+        step_cols = max(block_bytes // (step_rows * itemsize) // size, 1) * size  # 区间不跨块
+        shape = (rows, -(-n // size))
+        mins, maxs = np.empty(shape, dtype=self.y.dtype), np.empty(shape, dtype=self.y.dtype)
+        for i in range(0, rows, step_rows):
+            for j in range(0, n, step_cols):
+                block = np.asarray(self.y[i:i + step_rows, j:j + step_cols])
+                bins = slice(j // size, j // size + -(-block.shape[1] // size))
+                mins[i:i + step_rows, bins], maxs[i:i + step_rows, bins] = self.reduce(block, block, size)
+        return mins, maxs
+
+    def raw(self, start: int, stop: int) -> np.array:
+        """
+        第 start 至 stop - 1 个采样点的原始数据，惰性数组只读取这一部分
+        Args:
+            start: 起始采样点
+            stop: 终止采样点（不含）
+
+        Returns: 纵坐标
+
+        """
+        if isinstance(self.y, DASArray):
+            return np.asarray(self.y[:, start:stop])
+        return self.y[..., start:stop]
+
+    def __len__(self) -> int:
+        return self.y.shape[-1]
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        横纵坐标的范围，由最粗一层得到，不遍历原始数据
+        Returns: 横坐标最小值，最大值，纵坐标最小值，最大值（忽略 nan）
+
+        """
+        return float(self.x[0]), float(self.x[-1]), float(np.fmin.reduce(self.mins[-1], axis=None)), \
+            float(np.fmax.reduce(self.maxs[-1], axis=None))
+
+    def bins(self, level: int, first: int, last: int) -> Tuple[np.array, np.array]:
+        """
+        第 level 层中第 first 至 last - 1 个区间的绘图点，每个区间为位于区间起点的最小值与最大值
+        Args:
+            level: 层
+            first: 起始区间
+            last: 终止区间（不含）
+
+        Returns: 横坐标，纵坐标
+
+        """
+        if level == 0:
+            return self.x[first:last], self.raw(first, last)
+        size = self.bin_sizes[level]
+        x = np.repeat(self.x[first * size:last * size:size], 2)
+        if self.mins[level] is None:  # 未保存的层由原始数据计算
+            raw = self.raw(first * size, last * size)
+            mins, maxs = self.reduce(raw, raw, size)
+        else:
+            mins, maxs = self.mins[level][..., first:last], self.maxs[level][..., first:last]
+        y = np.empty(self.y.shape[:-1] + (len(x),), dtype=self.y.dtype)
+        y[..., 0::2], y[..., 1::2] = mins, maxs
+        return x, y
+
+    def view(self, x0: float, x1: float, width: int) -> Tuple[np.array, np.array]:
+        """
+        横坐标范围 [x0, x1] 内的点数约为像素宽度的 2 倍，范围外为最粗一层的点
+        Args:
+            x0: 可见范围起点
+            x1: 可见范围终点
+            width: 可见范围的像素宽度
+
+        Returns: 横坐标，纵坐标
+
+        """
+        n = len(self)
+        top = len(self.bin_sizes) - 1
+        if top == 0:
+            return self.x, self.raw(0, n)
+
+        i0 = max(np.searchsorted(self.x, x0, side='left') - 1, 0)
+        i1 = min(np.searchsorted(self.x, x1, side='right') + 1, n)
+        level = 0  # 可见区间数不少于像素宽度一半的最粗一层，点数在像素宽度的 1 至 4 倍之间
+        while level < top and (i1 - i0) / self.bin_sizes[level + 1] >= max(width, 1) / 2:
+            level += 1
+
+        coarse = self.bin_sizes[top]
+        first, last = i0 // coarse, -(-i1 // coarse)  # 可见范围所在的最粗一层的区间
+        size = self.bin_sizes[level]
+        parts = [self.bins(top, 0, first),
+                 self.bins(level, first * coarse // size, -(-min(last * coarse, n) // size)),
+                 self.bins(top, last, self.mins[top].shape[-1])]
+        if level != 0 or last < self.mins[top].shape[-1]:
+            parts.append((self.x[-1:], self.raw(n - 1, n)))  # 保留最后一个采样点，使横坐标范围与完整数据相同
+        return np.concatenate([x for x, _ in parts]), np.concatenate([y for _, y in parts], axis=-1)
+
+
+POOLING_METHODS = {'max': '最大值', 'mean': '平均值'}  # 块降采样方式
+
+
+def blockFactors(shape: Tuple[int, int], budget: int) -> Tuple[int, int]:
+    """
+    使二维网格降采样后的点数不超过上限的块大小
+    行数先缩小到约 sqrt(budget)（列数较少时保留更多行），剩余的点数全部分给列
+    Args:
+        shape: 网格的（行数，列数）
+        budget: 点数上限
+
+    Returns: 块的（行数，列数）
+
+    """
+    rows, cols = shape
+    budget = max(budget, 1)
+    r = max(-(-rows // max(min(rows, max(math.isqrt(budget), budget // max(cols, 1))), 1)), 1)
+    c = max(-(-cols // max(budget // max(-(-rows // r), 1), 1)), 1)
+    return r, c
+
+
+def blockReduce(data: np.array, factors: Tuple[int, int], method: str = 'max') -> np.array:
+    """
+    二维数据按块合并，末尾不满的块只合并其中的点（忽略 nan）
+    Args:
+        data: 二维数据
+        factors: 块的（行数，列数）
+        method: max 取块内最大值，mean 取块内平均值
+
+    Returns: 合并后的数据
+
+    """
+    if method not in POOLING_METHODS:
+        raise ValueError(f'不支持的降采样方式：{method}')
+    r, c = factors
+    if (r, c) == (1, 1):
+        return np.asarray(data)
+    rows, cols = data.shape
+    padded = np.pad(np.asarray(data, dtype=np.result_type(data, np.float32)),
+                    [(0, -rows % r), (0, -cols % c)], constant_values=np.nan)
+    blocks = padded.reshape(padded.shape[0] // r, r, padded.shape[1] // c, c)
+    return np.nanmax(blocks, axis=(1, 3)) if method == 'max' else np.nanmean(blocks, axis=(1, 3))
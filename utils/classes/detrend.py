@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午9:10
+@Author  : zxy
+@File    : detrend.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def centeredTime(n: int, dtype: np.dtype) -> Tuple[np.array, float]:
+    """
+    以中点为原点的采样点序号，此时 Σt = 0，直线的截距即均值
+    Args:
+        n: 采样次数
+        dtype: 数据类型
+
+    Returns: 采样点序号，Σt²
+
+    """
+    return (np.arange(n) - (n - 1) / 2).astype(dtype), n * (n ** 2 - 1) / 12
+
+
+def fitLine(data: np.array, t: np.array, denominator: float) -> Tuple[np.array, np.array]:
+    """
+    各通道的最小二乘直线
+    Args:
+        data: （通道数，采样次数）数据
+        t: centeredTime 得到的采样点序号
+        denominator: centeredTime 得到的 Σt²
+
+    Returns: 各通道的均值与斜率，形状均为（通道数，1）
+
+    """
+    mean = data.mean(axis=1, keepdims=True)
+    slope = (data @ t)[:, None] / denominator  # Σt = 0，因此不必先减去均值
+    return mean, slope
+
+
+def linearDetrend(data: np.array, block_bytes: int = 32 * 1024 ** 2, max_workers: Optional[int] = None) -> np.array:
+    """
+    原地去除各通道的最小二乘直线（同时去除均值），通道分块后由线程池并行处理
+    以采样点中点为原点时直线的截距即均值、斜率为 Σt·y / Σt²，不需要像 scipy 的 detrend 那样复制整个数组，
+    每个线程只需要一个块大小的临时数组
+    Args:
+        data: 可写的（通道数，采样次数）浮点数据，会被原地修改
+        block_bytes: 每块数据的字节数
+        max_workers: 线程数，默认由 ThreadPoolExecutor 决定
+
+    Returns: 去趋势后的数据，即 data 本身
+
+    """
+    channels_num, n = data.shape
+    if not channels_num or not n:
+        return data
+    if n == 1:
+        data[:] = 0
+        return data
+
+    t, denominator = centeredTime(n, data.dtype)
+    step = max(block_bytes // (n * data.itemsize), 1)  # 每块的通道数
+
+    def run(start: int) -> None:
+        block = data[start:start + step]
+        mean, slope = fitLine(block, t, denominator)
+        block -= mean
+        block -= slope * t
+
+    starts = range(0, channels_num, step)
+    if len(starts) == 1:
+        run(0)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(run, starts))  # 取出结果以抛出线程中的错误
+    return data
@@ -12,6 +12,7 @@ from PyEMD import EMD, EEMD, CEEMDAN
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QScrollArea
+from scipy import fft
 from scipy.signal import hilbert
 
 from utils.function import xAxis, initCombinedPlotWidget
@@ -94,7 +95,7 @@ class EMDHandler:
                 pw_time_list.append(pw_time)
                 pw_time_list[i].setXLink(pw_time_list[0])  # 设置时域x轴对应
 
-                data = np.abs(np.fft.fft(x))[:self.sampling_times // 2] * 2.0 / self.sampling_times
+                data = np.abs(fft.rfft(x))[:self.sampling_times // 2] * 2.0 / self.sampling_times
                 pw_fre.setFixedHeight(150)
                 pw_fre.draw(x_fre, data, pen=QColor('blue'))
                 pw_fre_list.append(pw_fre)
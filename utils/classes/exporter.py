@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午11:20
+@Author  : zxy
+@File    : exporter.py
+"""
+import os
+import pickle
+import re
+import zipfile
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .reader import DTYPE, NORMAL_HEADER_LENGTH
+
+SEPARATORS = {'txt': ' ', 'csv': ',', 'xls': '\t'}  # 文本格式的分隔符
+TEXT_EXPANSION = 16  # 格式化为文本时每个数值占用的内存约为其二进制大小的倍数，文本导出的块相应缩小
+
+
+def iterBlocks(data: np.array, block_bytes: int) -> Iterator[np.array]:
+    """
+    按通道分块读取数据，惰性数组只读取当前块
+    Args:
+        data: （通道数，采样次数）数据或 DASArray
+        block_bytes: 每块的字节数
+
+    Returns: 各块的（通道数，采样次数）数据
+
+    """
+    step = max(block_bytes // max(data.shape[1] * data.dtype.itemsize, 1), 1)
+    for i in range(0, data.shape[0], step):
+        yield np.asarray(data[i:i + step])
+
+
+def iterRowChunks(data: np.array, block_bytes: int) -> Iterator[Tuple[np.array, bool, bool]]:
+    """
+    按块读取数据用于文本导出，单个通道超过块大小时按采样点分段读取，占用内存不随通道长度增长
+    Args:
+        data: （通道数，采样次数）数据或 DASArray
+        block_bytes: 每块的字节数
+
+    Returns: 各块的（通道数，采样次数）数据，是否从行首开始，是否到行尾结束；多个通道的块总是完整的行
+
+    """
+    columns = max(block_bytes // data.dtype.itemsize, 1)
+    if data.shape[1] <= columns:
+        for block in iterBlocks(data, block_bytes):
+            yield block, True, True
+        return
+    for i in range(data.shape[0]):
+        for j in range(0, data.shape[1], columns):
+            yield np.asarray(data[i:i + 1, j:j + columns]), j == 0, j + columns >= data.shape[1]
+
+
+def formatRows(block: np.array, sep: str) -> str:
+    """
+    把数据块格式化为文本，每个通道一行
+    float64 使用最短的可还原表示，float32 使用 9 位有效数字，同样可以还原
+    Args:
+        block: （通道数，采样次数）数据
+        sep: 分隔符
+
+    Returns: 文本，以换行结尾
+
+    """
+    if block.dtype == np.float32:
+        fmt = sep.join(['%.9g'] * block.shape[1])
+        return ''.join(fmt % tuple(row) + '\n' for row in block.tolist())
+    return ''.join(sep.join(map(repr, row)) + '\n' for row in block.tolist())
+
+
+def writeText(data: np.array,
+              f,
+              sep: str,
+              block_bytes: int,
+              progress: Callable[[int, int], None],
+              cancelled: Callable[[], bool]) -> bool:
+    """
+    逐块写入以分隔符分隔的文本，每个通道一行，较长的通道分段写入
+    Returns: 是否写完，取消时为 False
+
+    """
+    done = 0
+    for block, row_start, row_end in iterRowChunks(data, block_bytes // TEXT_EXPANSION):
+        if cancelled():
+            return False
+        text = formatRows(block, sep)
+        f.write(('' if row_start else sep) + (text if row_end else text[:-1]))
+        if row_end:
+            done += len(block)
+            progress(done, data.shape[0])
+    return True
+
+
+def writeJSON(data: np.array,
+              f,
+              block_bytes: int,
+              progress: Callable[[int, int], None],
+              cancelled: Callable[[], bool]) -> bool:
+    """
+    逐块写入 JSON 二维数组，每个通道一个数组，较长的通道分段写入，nan 与 inf 写为 null
+    数值的写法同 formatRows，为可还原的完整精度
+    Returns: 是否写完，取消时为 False
+
+    """
+    f.write('[')
+    done, first = 0, True
+    for block, row_start, row_end in iterRowChunks(data, block_bytes // TEXT_EXPANSION):
+        if cancelled():
+            return False
+        text = formatRows(block, ',')
+        if not np.isfinite(block).all():
+            text = re.sub(r'-?\b(?:nan|inf)\b', 'null', text)
+        prefix = (('' if first else ',') + '[') if row_start else ','
+        f.write(prefix + '],['.join(text.splitlines()) + (']' if row_end else ''))
+        first = False
+        if row_end:
+            done += len(block)
+            progress(done, data.shape[0])
+    f.write(']')
+    return True
+
+
+def writePickle(data: np.array,
+                f,
+                block_bytes: int,
+                progress: Callable[[int, int], None],
+                cancelled: Callable[[], bool]) -> bool:
+    """
+    写入 pickle，保存为 DataFrame 以兼容原有的导出结果，pickle 只能一次性写入
+    Returns: 是否写完，取消时为 False
+
+    """
+    if cancelled():
+        return False
+    pickle.dump(pd.DataFrame(np.asarray(data)), f, protocol=pickle.HIGHEST_PROTOCOL)
+    progress(data.shape[0], data.shape[0])
+    return True
+
+
+def writeBuffer(f, block: np.array) -> None:
+    """
+    直接写入数据块的内存，连续的块整体写入，否则逐行写入（每行连续时不复制）
+    Args:
+        f: 二进制文件
+        block: （通道数，采样次数）数据
+
+    Returns:
+
+    """
+    if block.flags.c_contiguous:
+        f.write(memoryview(block).cast('B'))
+        return
+    for row in block:
+        f.write(memoryview(np.ascontiguousarray(row)).cast('B'))
+
+
+def writeNPY(data: np.array,
+             f,
+             block_bytes: int,
+             progress: Callable[[int, int], None],
+             cancelled: Callable[[], bool]) -> bool:
+    """
+    逐块写入 .npy，先写入由形状与数据类型生成的文件头，再直接写入各块的内存
+    Returns: 是否写完，取消时为 False
+
+    """
+    np.lib.format.write_array_header_2_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(data.dtype)),
+                                            'fortran_order': False,
+                                            'shape': tuple(data.shape)})
+    done = 0
+    for block in iterBlocks(data, block_bytes):
+        if cancelled():
+            return False
+        writeBuffer(f, block)
+        done += len(block)
+        progress(done, data.shape[0])
+    return True
+
+
+def writeDAT(data: np.array,
+             f,
+             block_bytes: int,
+             progress: Callable[[int, int], None],
+             cancelled: Callable[[], bool],
+             time: np.array,
+             sampling_rate: int) -> bool:
+    """
+    逐块写入普通采集格式的 .dat，可由本软件重新读取
+    文件头为 10 个 float32：GPS时间（6 个）、采样率、两个保留值、通道数；数据按通道存储为小端 float32
+    Returns: 是否写完，取消时为 False
+
+    """
+    header = np.zeros(NORMAL_HEADER_LENGTH, dtype=DTYPE)
+    header[:6], header[6], header[9] = time[:6], sampling_rate, data.shape[0]
+    writeBuffer(f, header[None])
+    done = 0
+    for block in iterBlocks(data, block_bytes):
+        if cancelled():
+            return False
+        writeBuffer(f, block.astype(DTYPE, copy=False))  # 已是 float32 时不复制
+        done += len(block)
+        progress(done, data.shape[0])
+    return True
+
+
+def writeNPZ(data: np.array,
+             f,
+             block_bytes: int,
+             progress: Callable[[int, int], None],
+             cancelled: Callable[[], bool],
+             time: Optional[np.array] = None,
+             sampling_rate: Optional[int] = None) -> bool:
+    """
+    逐块写入 zlib 压缩的 .npz，数据为 data，给出时另存 GPS时间 time 与采样率 sampling_rate
+    数据以 .npy 格式直接写入压缩流，不在内存中生成完整的 .npy
+    Returns: 是否写完，取消时为 False
+
+    """
+    with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open('data.npy', 'w', force_zip64=True) as entry:
+            if not writeNPY(data, entry, block_bytes, progress, cancelled):
+                return False
+        for name, value in [('time', time), ('sampling_rate', sampling_rate)]:
+            if value is not None:
+                with zf.open(f'{name}.npy', 'w') as entry:
+                    np.lib.format.write_array(entry, np.asarray(value))
+    return True
+
+
+def exportFile(data: np.array,
+               path: str,
+               fmt: str,
+               block_bytes: int = 8 * 1024 ** 2,
+               progress: Optional[Callable[[int, int], None]] = None,
+               cancelled: Optional[Callable[[], bool]] = None,
+               time: Optional[np.array] = None,
+               sampling_rate: Optional[int] = None) -> bool:
+    """
+    按通道分块导出数据，占用内存与导出数据大小无关
+    先写入临时文件，完成后再替换目标文件，取消或出错时删除临时文件
+    Args:
+        data: （通道数，采样次数）数据或 DASArray
+        path: 导出文件路径
+        fmt: 格式，txt、csv、xls（制表符分隔）、json、pickle、npy、dat（普通采集格式）或 npz（压缩）
+        block_bytes: 每块读取的字节数，文本格式按 TEXT_EXPANSION 缩小
+        progress: 进度回调，参数为已写入的通道数与总通道数
+        cancelled: 返回是否取消的回调，每块写入前检查
+        time: 第一个采样点的 6 个GPS时间值，dat 格式必须给出
+        sampling_rate: 采样率，dat 格式必须给出
+
+    Returns: 是否导出完成，取消时为 False
+
+    """
+    progress = progress or (lambda done, total: None)
+    cancelled = cancelled or (lambda: False)
+
+    tmp_path = f'{path}.part'
+    try:
+        if fmt in SEPARATORS:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                finished = writeText(data, f, SEPARATORS[fmt], block_bytes, progress, cancelled)
+        elif fmt == 'json':
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                finished = writeJSON(data, f, block_bytes, progress, cancelled)
+        elif fmt == 'pickle':
+            with open(tmp_path, 'wb') as f:
+                finished = writePickle(data, f, block_bytes, progress, cancelled)
+        elif fmt == 'npy':
+            with open(tmp_path, 'wb') as f:
+                finished = writeNPY(data, f, block_bytes, progress, cancelled)
+        elif fmt == 'dat':
+            if time is None or sampling_rate is None:
+                raise ValueError('导出 .dat 需要GPS时间与采样率')
+            with open(tmp_path, 'wb') as f:
+                finished = writeDAT(data, f, block_bytes, progress, cancelled, time, sampling_rate)
+        elif fmt == 'npz':
+            with open(tmp_path, 'wb') as f:
+                finished = writeNPZ(data, f, block_bytes, progress, cancelled, time, sampling_rate)
+        else:
+            raise ValueError(f'不支持的导出格式：{fmt}')
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if not finished:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
@@ -5,7 +5,7 @@
 @File    : feature.py
 """
 import numpy as np
-from scipy import stats
+from scipy import fft, stats
 
 
 class FeatureCalculator:
@@ -119,7 +119,7 @@ class FeatureCalculator:
 
     def fft(self) -> np.array:
         """fft 结果"""
-        return np.fft.fft(self.data, axis=1)[:, :self.sampling_times // 2]
+        return fft.rfft(self.data, axis=1)[:, :self.sampling_times // 2]  # 保持数据精度，float32 数据得到 complex64
 
     def magnitude(self) -> np.array:
         """信号幅值"""
@@ -402,7 +402,7 @@ class FilterI:
 
         """
         self.draw = True
-        self.data = filtfilt(self.b, self.a, self.data)  # 滤波
+        self.data = filtfilt(self.b, self.a, self.data).astype(self.data.dtype, copy=False)  # 滤波，结果保持原数据精度
 
 
 class FilterII:
@@ -445,7 +445,7 @@ class FilterII:
 
         """
         self.draw = True
-        self.data = filtfilt(self.b, self.a, self.data)  # 滤波
+        self.data = filtfilt(self.b, self.a, self.data).astype(self.data.dtype, copy=False)  # 滤波，结果保持原数据精度
 
     def runDialog(self):
         """
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/19 上午1:10
+@Author  : zxy
+@File    : image_pyramid.py
+"""
+import math
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+PYRAMID_METHODS = {'maxabs': '最大绝对值', 'rms': '均方根'}  # 降采样方式
+RMS_RANGE_CELLS = 1 << 20  # 计算均方根色阶时使用的层的单元数上限
+RMS_RANGE_PERCENTILES = (1, 99)  # 均方根色阶的上下分位数，%
+
+
+def halve(data: np.array, axis: int, method: str) -> np.array:
+    """
+    沿某一轴每两个元素合并为一个，长度为奇数时最后一个元素单独合并
+    Args:
+        data: 二维数据
+        axis: 合并的轴
+        method: maxabs 保留绝对值较大的值（忽略 nan），rms 为平方和相加
+
+    Returns: 合并后的数据
+
+    """
+    a = data[:, 0::2] if axis else data[0::2]
+    b = data[:, 1::2] if axis else data[1::2]
+    if b.shape[axis] < a.shape[axis]:  # 长度为奇数，最后一个元素与空值合并
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (0, 1)
+        b = np.pad(b, pad, constant_values=np.nan if method == 'maxabs' else 0)
+    if method == 'maxabs':
+        return np.where((np.abs(b) > np.abs(a)) | np.isnan(a), b, a)
+    return a + b
+
+
+def cellSizes(n: int, k: int, first: int, count: int) -> np.array:
+    """
+    某一轴上每 2^k 个采样点合并为一个单元时，第 first 至 first + count - 1 个单元包含的采样点数，最后一个单元可能不满
+    Args:
+        n: 该轴的采样点数
+        k: 层
+        first: 起始单元
+        count: 单元数
+
+    Returns: 各单元的采样点数
+
+    """
+    starts = (np.arange(first, first + count) << k)
+    return np.minimum(starts + (1 << k), n) - starts
+
+
+class ImagePyramid:
+    """
+    （通道数，采样次数）数据的多分辨率分块图像金字塔，用于瀑布图只绘制可见范围内合适分辨率的图块
+    第 (kr, kc) 层沿通道每 2^kr 个、沿时间每 2^kc 个采样点合并为一个单元，单元值为其中绝对值最大的值（maxabs）或均方根（rms）；
+    两个方向分别降采样，因此通道数与采样次数相差很大时也能按视图选择合适的层
+    较粗的层在建立时一次性计算并保存，总大小不超过内存上限；较细的层在显示时按图块从原始数据计算，并缓存最近使用的图块
+    """
+
+    def __init__(self,
+                 data: np.array,
+                 method: str = 'maxabs',
+                 tile: int = 256,
+                 max_bytes: int = 256 * 1024 ** 2,
+                 block_bytes: int = 32 * 1024 ** 2,
+                 cache_bytes: int = 128 * 1024 ** 2):
+        """
+        Args:
+            data: （通道数，采样次数）数据或 DASArray
+            method: 降采样方式，maxabs 或 rms
+            tile: 图块边长，单元
+            max_bytes: 保存的层占用内存的上限，字节
+            block_bytes: 建立时每次读取的原始数据字节数
+            cache_bytes: 显示时计算的图块的缓存上限，字节
+
+        """
+        if method not in PYRAMID_METHODS:
+            raise ValueError(f'不支持的降采样方式：{method}')
+        self.source = data
+        self.method = method
+        self.tile = tile
+        self.block_bytes = block_bytes
+        self.shape = tuple(data.shape)
+        rows, cols = self.shape
+        self.top = (max(math.ceil(math.log2(max(rows, 1) / tile)), 0),
+                    max(math.ceil(math.log2(max(cols, 1) / tile)), 0))  # 每个方向只有一个图块的层
+
+        # 只保存 kr + kc >= base 的层，base 取满足内存上限的最小值
+        self.base = min(1, sum(self.top))
+        while self.base < sum(self.top) and \
+                sum(self.levelBytes(kr, kc) for kr, kc in self.levelKeys() if kr + kc >= self.base) > max_bytes:
+            self.base += 1
+        self.levels = {}  # 保存的层，键为 (kr, kc)
+        self.range = (0., 1.)  # 显示的色阶范围
+        self.cache = OrderedDict()  # 显示时计算的图块
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+
+    def levelKeys(self) -> List[Tuple[int, int]]:
+        """所有层"""
+        return [(kr, kc) for kr in range(self.top[0] + 1) for kc in range(self.top[1] + 1)]
+
+    def levelShape(self, kr: int, kc: int) -> Tuple[int, int]:
+        """第 (kr, kc) 层的（行数，列数）"""
+        return -(-self.shape[0] >> kr), -(-self.shape[1] >> kc)
+
+    def levelBytes(self, kr: int, kc: int) -> int:
+        """第 (kr, kc) 层保存为 float32 时的字节数"""
+        rows, cols = self.levelShape(kr, kc)
+        return rows * cols * 4
+
+    def build(self,
+              progress: Optional[Callable[[int, int], None]] = None,
+              cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        读取一遍原始数据，计算 kr + kc = base 的各层，再由这些层逐层合并得到更粗的层
+        maxabs 的色阶为原始数据的范围，rms 的色阶为保存的层中单元数不超过 RMS_RANGE_CELLS 的最细的层的分位数
+        Args:
+            progress: 进度回调，参数为已读取的通道数与总通道数
+            cancelled: 返回是否取消的回调，每块读取前检查
+
+        Returns: 是否建立完成，取消时为 False
+
+        """
+        progress = progress or (lambda done, total: None)
+        cancelled = cancelled or (lambda: False)
+        rows, cols = self.shape
+        base_keys = [(kr, self.base - kr) for kr in range(self.base + 1)
+                     if kr <= self.top[0] and self.base - kr <= self.top[1]]
+        for kr, kc in self.levelKeys():
+            if kr + kc >= self.base:
+                self.levels[(kr, kc)] = np.empty(self.levelShape(kr, kc), dtype=np.float32)
+
+        # 每块的起点需对齐各层的单元
+        row_align = 1 << max(kr for kr, _ in base_keys)
+        col_align = 1 << max(kc for _, kc in base_keys)
+        block_cols = min(max(self.block_bytes // 4 // row_align // col_align, 1) * col_align, -(-cols // col_align) *
+                         col_align)
+        block_rows = max(self.block_bytes // 4 // block_cols // row_align, 1) * row_align
+        low, high = np.inf, -np.inf
+        for r0 in range(0, rows, block_rows):
+            for c0 in range(0, cols, block_cols):
+                if cancelled():
+                    return False
+                block = np.array(self.source[r0:r0 + block_rows, c0:c0 + block_cols], dtype=np.float32)
+                if self.method == 'maxabs' and block.size and not np.isnan(block).all():
+                    low, high = min(low, np.nanmin(block)), max(high, np.nanmax(block))
+                if self.method == 'rms':
+                    block *= block  # 先保存平方和，全部合并后再转为均方根
+                for kc in range(max(kc for _, kc in base_keys) + 1):
+                    if (self.base - kc, kc) in base_keys:
+                        kr = self.base - kc
+                        level = block
+                        for _ in range(kr):
+                            level = halve(level, 0, self.method)
+                        self.levels[(kr, kc)][r0 >> kr:(r0 >> kr) + level.shape[0],
+                                              c0 >> kc:(c0 >> kc) + level.shape[1]] = level
+                    block = halve(block, 1, self.method)
+            progress(min(r0 + block_rows, rows), rows)
+
+        for s in range(self.base + 1, sum(self.top) + 1):
+            for kr, kc in self.levelKeys():
+                if kr + kc != s:
+                    continue
+                if (kr - 1, kc) in self.levels:
+                    self.levels[(kr, kc)] = halve(self.levels[(kr - 1, kc)], 0, self.method)
+                else:
+                    self.levels[(kr, kc)] = halve(self.levels[(kr, kc - 1)], 1, self.method)
+
+        if self.method == 'rms':
+            for (kr, kc), level in self.levels.items():
+                level /= np.outer(cellSizes(rows, kr, 0, level.shape[0]), cellSizes(cols, kc, 0, level.shape[1]))
+                np.sqrt(level, out=level)
+            # 均方根远小于原始数据的最大绝对值，色阶由均方根本身的分布得到，少数较大的单元不压缩色阶
+            level = max((level for level in self.levels.values() if level.size <= RMS_RANGE_CELLS),
+                        key=lambda level: level.size, default=self.levels[self.top])
+            values = level[np.isfinite(level)]
+            if values.size:
+                low, high = np.percentile(values, RMS_RANGE_PERCENTILES)
+                if low >= high:  # 分布集中在一个值时使用完整范围
+                    low, high = values.min(), values.max()
+        if low > high:  # 全部为 nan
+            low, high = 0., 1.
+        self.range = (float(low), float(high))
+        return True
+
+    def chooseLevel(self, rows_per_pixel: float, cols_per_pixel: float) -> Tuple[int, int]:
+        """
+        每个单元不小于一个像素的最粗的层
+        Args:
+            rows_per_pixel: 每个像素对应的通道数
+            cols_per_pixel: 每个像素对应的采样点数
+
+        Returns: 层
+
+        """
+        kr = min(max(int(math.floor(math.log2(max(rows_per_pixel, 1)))), 0), self.top[0])
+        kc = min(max(int(math.floor(math.log2(max(cols_per_pixel, 1)))), 0), self.top[1])
+        return kr, kc
+
+    def visibleTiles(self, level: Tuple[int, int], rows: Tuple[float, float], cols: Tuple[float, float]) -> \
+            List[Tuple[int, int]]:
+        """
+        与可见范围相交的图块
+        Args:
+            level: 层
+            rows: 可见的通道范围
+            cols: 可见的采样点范围
+
+        Returns: 图块的（行号，列号）
+
+        """
+        kr, kc = level
+        level_rows, level_cols = self.levelShape(kr, kc)
+        span_r, span_c = self.tile << kr, self.tile << kc  # 每个图块覆盖的原始通道数与采样点数
+        i0, i1 = max(int(rows[0] // span_r), 0), min(int(math.ceil(rows[1] / span_r)), -(-level_rows // self.tile))
+        j0, j1 = max(int(cols[0] // span_c), 0), min(int(math.ceil(cols[1] / span_c)), -(-level_cols // self.tile))
+        return [(i, j) for i in range(i0, i1) for j in range(j0, j1)]
+
+    def tileData(self, level: Tuple[int, int], i: int, j: int) -> np.array:
+        """
+        第 level 层的第 (i, j) 个图块
+        Args:
+            level: 层
+            i: 图块行号
+            j: 图块列号
+
+        Returns: （行数，列数）数据
+
+        """
+        kr, kc = level
+        t = self.tile
+        if level in self.levels:
+            return self.levels[level][i * t:(i + 1) * t, j * t:(j + 1) * t]
+
+        key = (level, i, j)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        rows, cols = self.shape
+        r0, c0 = (i * t) << kr, (j * t) << kc
+        data = np.array(self.source[r0:r0 + (t << kr), c0:c0 + (t << kc)], dtype=np.float32)
+        if self.method == 'rms':
+            data *= data
+        for _ in range(kr):
+            data = halve(data, 0, self.method)
+        for _ in range(kc):
+            data = halve(data, 1, self.method)
+        if self.method == 'rms':
+            data /= np.outer(cellSizes(rows, kr, i * t, data.shape[0]), cellSizes(cols, kc, j * t, data.shape[1]))
+            np.sqrt(data, out=data)
+
+        self.cache[key] = data
+        self.cached_bytes += data.nbytes
+        while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+            _, old = self.cache.popitem(last=False)
+            self.cached_bytes -= old.nbytes
+        return data
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 上午9:12
+@Author  : zxy
+@File    : reader.py
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import DecodeCache
+
+DTYPE = '<f4'  # .dat 文件数据类型，小端 float32
+NORMAL_HEADER_LENGTH = 10  # 普通采集文件头长度
+SCOUTER_HEADER_LENGTH = 64  # scouter 采集文件头长度
+SIDECAR_DIR = '.das_cache'  # scouter 文件按通道存储的缓存所在文件夹，位于数据文件夹下
+
+# scouter 采集模式
+ACQUISITION_MODES = {
+    1.: 'CNTE 连续模式',
+    2.: 'PTRI 预触发模式',
+    3.: 'WTRI 等待触发模式'
+}
+
+# scouter 光纤类型
+FIBER_TYPES = {
+    1.: 'SMF 单模光纤',
+    2.: 'MMF 多模光纤',
+    3.: 'MSF 微结构光纤'
+}
+
+
+def formatGPSTime(time: np.array, sep: str = '-') -> str:
+    """
+    GPS时间转字符串
+    Args:
+        time: 文件头中的 6 个GPS时间值
+        sep: 分隔符
+
+    Returns: 年、月、日、时、分为整数，秒保留小数
+
+    """
+    return sep.join(list(map(str, map(int, time[:5]))) + [str(time[5])])
+
+
+def parseHeader(header: np.array, is_scouter: bool, payload_length: int) -> Dict:
+    """
+    解析文件头
+    Args:
+        header: 文件头
+        is_scouter: 是否为 scouter 采集格式
+        payload_length: 文件头之后的数据长度（float 个数）
+
+    Returns: GPS时间、采样率、通道数、单个文件采样点数、单个文件时长与采集模式
+
+    """
+    if is_scouter:
+        sampling_rate, channels_num = int(header[10]), int(header[16])  # 采样率，传感点数
+        acquisition_mode = ACQUISITION_MODES.get(float(header[6]), '未知')
+    else:
+        sampling_rate, channels_num = int(header[6]), int(header[9])  # 采样率，通道数
+        acquisition_mode = '普通采集'
+    sampling_times = payload_length // channels_num if channels_num > 0 else 0  # 单个文件采样点数
+    return {
+        'time': header[:6],
+        'sampling_rate': sampling_rate,
+        'channels_num': channels_num,
+        'sampling_times': sampling_times,
+        'sampling_time': sampling_times / sampling_rate if sampling_rate > 0 else 0.,
+        'acquisition_mode': acquisition_mode
+    }
+
+
+def probeHeader(file: str, is_scouter: bool = False) -> Dict:
+    """
+    只读取文件头获取文件信息，不读取数据
+    Args:
+        file: .dat 文件路径
+        is_scouter: 是否为 scouter 采集格式
+
+    Returns: 文件头信息，见 parseHeader
+
+    """
+    header_length = SCOUTER_HEADER_LENGTH if is_scouter else NORMAL_HEADER_LENGTH
+    header = np.fromfile(file, dtype=DTYPE, count=header_length)
+    if len(header) < header_length:
+        raise ValueError(f'{os.path.basename(file)} 文件头不完整')
+    payload_length = os.path.getsize(file) // np.dtype(DTYPE).itemsize - header_length
+    return parseHeader(header, is_scouter, payload_length)
+
+
+def sidecarPaths(file: str) -> Tuple[str, str]:
+    """
+    scouter 文件缓存的路径
+    Args:
+        file: .dat 文件路径
+
+    Returns: 按通道存储的 .npy 数据路径，文件头 .json 路径
+
+    """
+    root = os.path.join(os.path.dirname(file), SIDECAR_DIR, os.path.splitext(os.path.basename(file))[0])
+    return f'{root}.npy', f'{root}.json'
+
+
+def loadSidecar(file: str) -> Optional[Tuple[np.array, np.array]]:
+    """
+    读取 scouter 文件的缓存，缓存不存在或原文件的修改时间、大小改变时返回 None
+    Args:
+        file: .dat 文件路径
+
+    Returns: 文件头，（通道数，采样次数）按通道连续存储的数据映射
+
+    """
+    npy_path, json_path = sidecarPaths(file)
+    try:
+        with open(json_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        stat = os.stat(file)
+        if meta['mtime'] != stat.st_mtime or meta['size'] != stat.st_size:
+            return None
+        return np.array(meta['header'], dtype=DTYPE), np.load(npy_path, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def writeSidecar(file: str, block: int = 4096) -> None:
+    """
+    将 scouter 文件转换为按通道存储的缓存，先写入临时文件再替换，避免读到写了一半的缓存
+    Args:
+        file: .dat 文件路径
+        block: 每次转换的采样点数
+
+    Returns:
+
+    """
+    if loadSidecar(file) is not None:
+        return
+
+    npy_path, json_path = sidecarPaths(file)
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    stat = os.stat(file)
+    reader = DATReader(file, is_scouter=True)
+
+    out = np.lib.format.open_memmap(f'{npy_path}.tmp', mode='w+', dtype=DTYPE,
+                                    shape=(reader.channels_num, reader.sampling_times))
+    data = reader.data
+    for i in range(0, reader.sampling_times, block):
+        out[:, i:i + block] = data[:, i:i + block]  # 按采样点分块，源文件顺序读取
+    out.flush()
+    del out
+    os.replace(f'{npy_path}.tmp', npy_path)
+
+    with open(f'{json_path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'mtime': stat.st_mtime, 'size': stat.st_size, 'header': reader.header.tolist()}, f)
+    os.replace(f'{json_path}.tmp', json_path)  # 文件头最后写入，存在即表示缓存完整
+
+
+class ScouterConverter:
+    """在后台线程中把 scouter 文件转换为按通道存储的缓存"""
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Args:
+            max_workers: 转换线程数，默认单线程以免影响前台读取
+
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = {}  # 各文件的转换任务及提交时的（修改时间，大小）
+
+    def submit(self, files: List[str]) -> None:
+        """
+        提交需要转换的文件，正在转换或已成功转换且之后未被修改的文件会被跳过，转换失败的文件会重新提交
+        之前提交但不在本次文件中、尚未开始的转换被取消，等待转换的只有最近提交的文件
+        Args:
+            files: .dat 文件路径
+
+        Returns:
+
+        """
+        submitted = set(files)
+        for file, (future, _) in self.futures.items():
+            if file not in submitted:
+                future.cancel()  # 已开始的转换不受影响
+        for file in files:
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            submitted = self.futures.get(file)
+            if submitted is not None:
+                future, submitted_signature = submitted
+                if not future.done() or (submitted_signature == signature and not future.cancelled() and
+                                         future.exception() is None):
+                    continue
+            self.futures[file] = (self.executor.submit(writeSidecar, file), signature)
+
+    def shutdown(self) -> None:
+        """
+        取消尚未开始的转换
+        Returns:
+
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DATReader:
+    """基于 np.memmap 的 .dat 文件读取器，只有被访问的部分才会读入内存"""
+
+    def __init__(self, file: str, is_scouter: bool = False, use_sidecar: bool = False):
+        """
+        映射文件并解析文件头
+        Args:
+            file: .dat 文件路径
+            is_scouter: 是否为 scouter 采集格式
+            use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+
+        """
+        self.file = file
+        self.is_scouter = bool(is_scouter)
+        self.header_length = SCOUTER_HEADER_LENGTH if self.is_scouter else NORMAL_HEADER_LENGTH
+
+        sidecar = loadSidecar(file) if self.is_scouter and use_sidecar else None
+        if sidecar is not None:
+            self.header, self.sidecar_data = sidecar
+            payload_length = self.sidecar_data.size
+        else:
+            self.raw_data = np.memmap(file, dtype=DTYPE, mode='r')
+            self.header = np.array(self.raw_data[:self.header_length])  # 文件头很小，直接复制
+            self.sidecar_data = None
+            payload_length = len(self.raw_data) - self.header_length
+        self.info = parseHeader(self.header, self.is_scouter, payload_length)
+        self.time = self.info['time']  # GPS时间
+        self.sampling_rate = self.info['sampling_rate']  # 采样率
+        self.channels_num = self.info['channels_num']  # 通道数
+        self.sampling_times = self.info['sampling_times']  # 单个文件采样点数
+
+    @property
+    def data(self) -> np.array:
+        """
+        不复制的（通道数，采样次数）数据视图
+        Returns: 数据视图
+
+        """
+        if self.sidecar_data is not None:
+            return self.sidecar_data  # 缓存已按通道连续存储
+        payload = self.raw_data[self.header_length:self.header_length + self.channels_num * self.sampling_times]
+        if self.is_scouter:
+            return payload.reshape(self.channels_num, -1, order='F')  # scouter 格式按采样点存储各通道
+        return payload.reshape(self.channels_num, -1)
+
+    def read(self, channels: slice = slice(None)) -> np.array:
+        """
+        只读取选中通道的视图
+        普通采集格式按通道存储，选中的连续通道对应文件中连续的一段；scouter 格式按采样点存储，为跨步读取
+        Args:
+            channels: 通道范围（从 0 开始，可带步长）
+
+        Returns: （选中通道数，采样次数）数据视图
+
+        """
+        return self.data[channels]
+
+
+def readFiles(files: List[str],
+              is_scouter: bool = False,
+              channels: slice = slice(None),
+              use_sidecar: bool = False,
+              dtype: np.dtype = np.float32,
+              process: Optional[Callable] = None,
+              cache: Optional[DecodeCache] = None,
+              max_workers: Optional[int] = None) -> Tuple[List[DATReader], np.array]:
+    """
+    多线程读取多个文件，按时间顺序拼接
+    先由文件头计算总大小并一次性分配输出数组，再由各线程把各自的文件直接写入对应的列
+    给出 process 时逐个文件处理（如去趋势），给出 cache 时处理后的文件数据会被缓存，再次读取时直接使用
+    Args:
+        files: .dat 文件路径
+        is_scouter: 是否为 scouter 采集格式
+        channels: 读取的通道范围（从 0 开始，可带步长），只有这些通道会从磁盘读取
+        use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+        dtype: 输出数据类型
+        process: 对单个文件（通道数，采样次数）数据的处理函数
+        cache: 处理后单个文件数据的缓存
+        max_workers: 线程数，默认由 ThreadPoolExecutor 决定
+
+    Returns: 各文件的读取器，（通道数，总采样次数）数据
+
+    """
+    readers = [DATReader(file, is_scouter, use_sidecar) for file in files]
+    channels_num = readers[0].channels_num
+    for reader in readers:
+        if reader.channels_num != channels_num:
+            raise ValueError(f'{os.path.basename(reader.file)} 的通道数（{reader.channels_num}）'
+                             f'与 {os.path.basename(readers[0].file)} 的通道数（{channels_num}）不一致')
+
+    offsets = np.cumsum([0] + [reader.sampling_times for reader in readers])  # 各文件在输出数组中的起始列
+    data = np.empty((len(range(*channels.indices(channels_num))), offsets[-1]), dtype=dtype)
+
+    def load(i: int) -> None:
+        if process is None and cache is None:
+            data[:, offsets[i]:offsets[i + 1]] = readers[i].read(channels)
+            return
+
+        key = DecodeCache.key(readers[i].file, is_scouter, channels, dtype) if cache is not None else None
+        block = cache.get(key) if cache is not None else None
+        if block is None:
+            block = readers[i].read(channels).astype(dtype)
+            if process is not None:
+                block = process(block)
+            if cache is not None:
+                cache.put(key, block)
+        data[:, offsets[i]:offsets[i + 1]] = block
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(load, range(len(readers))))  # 取出结果以抛出线程中的错误
+    return readers, data
+
+
+def readSegments(segments: List[Tuple[str, slice]],
+                 is_scouter: bool = False,
+                 channels: slice = slice(None),
+                 use_sidecar: bool = False,
+                 dtype: np.dtype = np.float32,
+                 process: Optional[Callable] = None,
+                 max_workers: Optional[int] = None) -> Tuple[List[DATReader], np.array]:
+    """
+    多线程读取多个文件中的部分采样点，按顺序拼接
+    只访问选中的采样点范围：普通采集格式每个通道读取一段连续数据，scouter 格式读取一段连续数据
+    给出 process 时逐段处理（如去趋势）
+    Args:
+        segments: （.dat 文件路径，采样点范围）列表，采样点范围从 0 开始，不支持步长
+        is_scouter: 是否为 scouter 采集格式
+        channels: 读取的通道范围（从 0 开始，可带步长）
+        use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+        dtype: 输出数据类型
+        process: 对每段（通道数，采样次数）数据的处理函数
+        max_workers: 线程数，默认由 ThreadPoolExecutor 决定
+
+    Returns: 各文件的读取器，（通道数，总采样次数）数据
+
+    """
+    readers = [DATReader(file, is_scouter, use_sidecar) for file, _ in segments]
+    channels_num, sampling_rate = readers[0].channels_num, readers[0].sampling_rate
+    for reader in readers:
+        if reader.channels_num != channels_num or reader.sampling_rate != sampling_rate:
+            raise ValueError(f'{os.path.basename(reader.file)} 的采样率或通道数'
+                             f'与 {os.path.basename(readers[0].file)} 不一致')
+
+    ranges = [range(*samples.indices(reader.sampling_times)) for reader, (_, samples) in zip(readers, segments)]
+    offsets = np.cumsum([0] + [len(r) for r in ranges])  # 各段在输出数组中的起始列
+    data = np.empty((len(range(*channels.indices(channels_num))), offsets[-1]), dtype=dtype)
+
+    def load(i: int) -> None:
+        block = readers[i].read(channels)[:, ranges[i].start:ranges[i].stop].astype(dtype)
+        if process is not None and block.shape[1]:
+            block = process(block)
+        data[:, offsets[i]:offsets[i + 1]] = block
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(load, range(len(readers))))  # 取出结果以抛出线程中的错误
+    return readers, data
+
+
+class Prefetcher:
+    """在后台线程中把接下来可能读取的文件预读到 DecodeCache，可随时取消"""
+
+    def __init__(self, cache: DecodeCache, max_bytes: int = 512 * 1024 ** 2):
+        """
+        Args:
+            cache: 预读数据写入的缓存
+            max_bytes: 单次预读占用内存上限，字节
+
+        """
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.cancel_event = threading.Event()
+
+    def prefetch(self,
+                 files: List[str],
+                 is_scouter: bool = False,
+                 channels: slice = slice(None),
+                 use_sidecar: bool = False,
+                 dtype: np.dtype = np.float32,
+                 process: Optional[Callable] = None,
+                 keep: Optional[List[str]] = None) -> None:
+        """
+        取消上一次预读，按顺序预读给出的文件，参数与 readFiles 相同
+        缓存已满时淘汰最近最少使用的其他文件腾出空间，当前显示的文件 keep 与预读的文件不会被淘汰；超过预读内存上限时停止
+        Args:
+            files: .dat 文件路径
+            is_scouter: 是否为 scouter 采集格式
+            channels: 读取的通道范围
+            use_sidecar: scouter 格式时是否优先读取按通道存储的缓存
+            dtype: 数据类型
+            process: 对单个文件数据的处理函数
+            keep: 当前显示的文件路径
+
+        Returns:
+
+        """
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.executor.submit(self.run, self.cancel_event, files, is_scouter, channels, use_sidecar, dtype, process,
+                             list(keep or []) + list(files))
+
+    def run(self,
+            cancel_event: threading.Event,
+            files: List[str],
+            is_scouter: bool,
+            channels: slice,
+            use_sidecar: bool,
+            dtype: np.dtype,
+            process: Optional[Callable],
+            keep: List[str]) -> None:
+        """
+        后台线程中执行的预读
+        Returns:
+
+        """
+        nbytes = 0
+        for file in files:
+            if cancel_event.is_set():
+                return
+            try:
+                if DecodeCache.key(file, is_scouter, channels, dtype) in self.cache:
+                    continue
+                info = probeHeader(file, is_scouter)
+                size = len(range(*channels.indices(info['channels_num']))) * info['sampling_times'] * \
+                    np.dtype(dtype).itemsize
+                if nbytes + size > self.max_bytes or not self.cache.makeRoom(size, keep):
+                    return
+                readFiles([file], is_scouter, channels, use_sidecar, dtype, process, self.cache, max_workers=1)
+                nbytes += size
+            except (OSError, ValueError):
+                continue  # 预读失败的文件留给前台读取时报错
+
+    def cancel(self) -> None:
+        """
+        取消正在进行的预读，当前文件读取完成后停止
+        Returns:
+
+        """
+        self.cancel_event.set()
+
+    def shutdown(self) -> None:
+        """
+        取消预读并关闭线程
+        Returns:
+
+        """
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
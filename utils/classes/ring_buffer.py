@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午1:40
+@Author  : zxy
+@File    : ring_buffer.py
+"""
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    （通道数，采样次数）数据的滑动窗口，以文件为单位在两端增删列
+    开始滑动时才在窗口两侧各预留约半个窗口的空列，新文件直接写入空列，空列用完时才把窗口复制到新分配的缓冲区中间，
+    因此每移动一个文件平均只需复制常数个文件的数据
+    data 返回的视图可能仍被其他标签页使用，因此从不改写曾经通过 data 给出的列，需要写入这些列时同样改为重新分配
+    """
+
+    def __init__(self, data: np.array, lengths: List[int], maxlen: Optional[int] = None):
+        """
+        Args:
+            data: 初始（通道数，采样次数）数据，直接作为缓冲区使用，不复制
+            lengths: 初始数据中各文件的采样次数
+            maxlen: 窗口最多保留的文件数，超出时丢弃另一端的文件，默认为初始文件数
+
+        """
+        self.lengths = deque(lengths)
+        self.maxlen = maxlen if maxlen is not None else len(lengths)
+        self.buffer = data
+        self.start, self.stop = 0, data.shape[1]
+        self.exposed = (self.start, self.stop)  # 当前缓冲区中曾经给出的列范围，不可再写入
+
+    @property
+    def data(self) -> np.array:
+        """
+        当前窗口的数据视图
+        Returns: （通道数，采样次数）数据
+
+        """
+        self.exposed = (min(self.exposed[0], self.start), max(self.exposed[1], self.stop))
+        return self.buffer[:, self.start:self.stop]
+
+    @property
+    def width(self) -> int:
+        """当前窗口的采样次数"""
+        return self.stop - self.start
+
+    def reallocate(self, width: int) -> None:
+        """
+        按窗口宽度重新分配缓冲区，窗口位于中间，原缓冲区及已给出的视图保持不变
+        Args:
+            width: 期望容纳的窗口宽度
+
+        Returns:
+
+        """
+        window = self.buffer[:, self.start:self.stop]
+        slack = max(width // 2, 1)
+        buffer = np.empty((window.shape[0], width + 2 * slack), dtype=window.dtype)
+        start = slack + (width - window.shape[1]) // 2
+        buffer[:, start:start + window.shape[1]] = window
+        self.buffer, self.start, self.stop = buffer, start, start + window.shape[1]
+        self.exposed = (start, start)  # 新缓冲区尚未给出任何列
+
+    def append(self, block: np.array) -> None:
+        """
+        在末尾加入一个文件的数据，超出文件数时丢弃最早的文件
+        Args:
+            block: 单个文件的（通道数，采样次数）数据
+
+        Returns:
+
+        """
+        if len(self.lengths) >= self.maxlen:
+            self.start += self.lengths.popleft()
+        n = block.shape[1]
+        if self.stop + n > self.buffer.shape[1] or self.stop < self.exposed[1]:  # 空列不足或会改写已给出的列
+            self.reallocate(self.width + n)
+        self.buffer[:, self.stop:self.stop + n] = block
+        self.stop += n
+        self.lengths.append(n)
+
+    def appendleft(self, block: np.array) -> None:
+        """
+        在开头加入一个文件的数据，超出文件数时丢弃最晚的文件
+        Args:
+            block: 单个文件的（通道数，采样次数）数据
+
+        Returns:
+
+        """
+        if len(self.lengths) >= self.maxlen:
+            self.stop -= self.lengths.pop()
+        n = block.shape[1]
+        if self.start - n < 0 or self.start > self.exposed[0]:  # 空列不足或会改写已给出的列
+            self.reallocate(self.width + n)
+        self.buffer[:, self.start - n:self.start] = block
+        self.start -= n
+        self.lengths.appendleft(n)
@@ -10,11 +10,13 @@ import numpy as np
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QWidget
 from matplotlib import pyplot as plt
+from scipy import fft
 from scipy.signal.windows import *
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
+from utils.classes.decimation import POOLING_METHODS, blockFactors, blockReduce
 from utils.function import xAxis
-from utils.widget import PushButton, LineEditWithReg, Label, ComboBox, Dialog, MyPlotWidget
+from utils.widget import PushButton, LineEditWithReg, Label, ComboBox, Dialog, MyPlotWidget, TimeFrequencyWidget
 
 
 class SpectrumHandler:
@@ -59,6 +61,8 @@ class SpectrumHandler:
         self.window_text = 'Rectangular / Dirichlet'  # 加窗名称
         self.frame_length = 256  # 帧长
         self.frame_shift = 128  # 帧移
+        self.surface_vertices = 10000  # 三维图的网格点数上限
+        self.surface_pooling = 'max'  # 三维图的块降采样方式
 
     def runDialog(self):
         """
@@ -95,6 +99,16 @@ class SpectrumHandler:
         self.frame_shift_line_edit.setText(str(self.frame_shift))
         self.frame_shift_line_edit.setToolTip('帧每次移动的长度')
 
+        surface_vertices_label = Label('三维网格点数')
+        self.surface_vertices_line_edit = LineEditWithReg()
+        self.surface_vertices_line_edit.setText(str(self.surface_vertices))
+        self.surface_vertices_line_edit.setToolTip('3d 时网格点数超过该值则按块降采样')
+
+        surface_pooling_label = Label('三维降采样')
+        self.surface_pooling_combx = ComboBox()
+        self.surface_pooling_combx.addItems(POOLING_METHODS.values())
+        self.surface_pooling_combx.setCurrentText(POOLING_METHODS[self.surface_pooling])
+
         btn = PushButton('确定')
         btn.clicked.connect(self.updateParams)
         btn.clicked.connect(self.plotSpectrum)
@@ -104,6 +118,7 @@ class SpectrumHandler:
         hbox1 = QHBoxLayout()
         hbox2 = QHBoxLayout()
         hbox3 = QHBoxLayout()
+        hbox4 = QHBoxLayout()
         vbox = QVBoxLayout()
 
         hbox.addWidget(feature_label)
@@ -120,11 +135,17 @@ class SpectrumHandler:
         hbox3.addWidget(frame_shift_label)
         hbox3.addStretch(1)
         hbox3.addWidget(self.frame_shift_line_edit)
+        hbox4.addWidget(surface_vertices_label)
+        hbox4.addWidget(self.surface_vertices_line_edit)
+        hbox4.addStretch(1)
+        hbox4.addWidget(surface_pooling_label)
+        hbox4.addWidget(self.surface_pooling_combx)
 
         vbox.addLayout(hbox)
         vbox.addLayout(hbox1)
         vbox.addLayout(hbox2)
         vbox.addLayout(hbox3)
+        vbox.addLayout(hbox4)
         vbox.addWidget(btn)
 
         dialog.setLayout(vbox)
@@ -141,6 +162,8 @@ class SpectrumHandler:
         self.window_text = self.window_method_combx.currentText()
         self.frame_length = int(self.frame_length_line_edit.text())
         self.frame_shift = int(self.frame_shift_line_edit.text())
+        self.surface_vertices = int(self.surface_vertices_line_edit.text())
+        self.surface_pooling = {v: k for k, v in POOLING_METHODS.items()}[self.surface_pooling_combx.currentText()]
 
     @staticmethod
     def fft(data: np.array) -> np.array:
@@ -152,7 +175,7 @@ class SpectrumHandler:
         Returns: fft 半谱
 
         """
-        return np.fft.fft(data)[:len(data) // 2]
+        return fft.rfft(data)[:len(data) // 2]  # 保持数据精度，float32 数据得到 complex64
 
     def todB(self, data: np.array) -> np.array:
         """
@@ -246,20 +269,29 @@ class SpectrumHandler:
             plot_widget = MyPlotWidget(title, '频率（Hz）', unit, grid=True)
             x = xAxis(self.sampling_times, sampling_rate=self.sampling_rate, freq=True)
             plot_widget.draw(x, ret, pen=QColor('blue'))
+        elif self.dimension == '2d':
+            t, fs, frames = ret
+            plot_widget = TimeFrequencyWidget(title, unit)
+            plot_widget.setMatrix(t, fs, frames, (self.sampling_times_from / self.sampling_rate,
+                                                  self.sampling_times_to / self.sampling_rate),
+                                  (0, self.sampling_rate / 2))
         else:
             t, fs, frames = ret
+            factors = blockFactors(frames.shape, self.surface_vertices)
+            if factors != (1, 1):  # 网格点数超过上限时按块降采样，坐标取块内平均值
+                df = factors[0] * (fs[-1] - fs[0]) / max(len(fs) - 1, 1)  # 降采样后的频率与时间分辨率
+                dt = factors[1] * (t[-1] - t[0]) / max(len(t) - 1, 1)
+                frames = blockReduce(frames, factors, self.surface_pooling)
+                t = blockReduce(t[None, :], (1, factors[1]), 'mean')[0]
+                fs = blockReduce(fs[:, None], (factors[0], 1), 'mean')[:, 0]
+                title = f'{title}\n降采样为 {frames.shape[0]}×{frames.shape[1]}' \
+                        f'（{POOLING_METHODS[self.surface_pooling]}），分辨率 {df:.3g} Hz × {dt:.3g} s'
             figure = plt.figure()
             plot_widget = FigureCanvas(figure)
-            if self.dimension == '2d':
-                ax = plt.gca()
-                ax.tick_params(axis='both', which='both', direction='in')
-                im = ax.pcolormesh(t, fs, frames, shading='gouraud')
-            else:
-                ax = figure.add_subplot(projection='3d')
-                ax.tick_params(axis='both', which='both', direction='in')
-                im = ax.plot_surface(t[None, :], fs[:, None], frames, cmap='viridis')
-                ax.set_zlabel(unit)
-
+            ax = figure.add_subplot(projection='3d')
+            ax.tick_params(axis='both', which='both', direction='in')
+            im = ax.plot_surface(t[None, :], fs[:, None], frames, rstride=1, cstride=1, cmap='viridis')
+            ax.set_zlabel(unit)
             ax.set_title(title)
             ax.set_xlabel('时间（s）')
             ax.set_ylabel('频率（Hz）')
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 下午3:20
+@Author  : zxy
+@File    : tile_store.py
+"""
+import json
+import os
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .reader import DATReader, probeHeader
+
+MANIFEST = 'manifest.json'  # 分块存储的描述文件
+
+
+def convertToTileStore(files: List[str],
+                       path: str,
+                       is_scouter: bool = False,
+                       tile_channels: int = 256,
+                       tile_samples: Optional[int] = None,
+                       process: Optional[Callable] = None,
+                       max_workers: int = 2,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       cancelled: Optional[Callable[[], bool]] = None) -> Optional['TileStore']:
+    """
+    把多个 .dat 文件转换为分块存储，各文件由线程池并行转换
+    数据按（通道块，时间块）切分，每块保存为一个 .npy 文件，时间块不跨越文件
+    每个文件按通道块逐块读取、处理并写入，每个线程同时只持有一个通道块，占用内存与文件数和文件大小无关
+    Args:
+        files: 按时间顺序排列的 .dat 文件路径
+        path: 分块存储文件夹
+        is_scouter: 是否为 scouter 采集格式
+        tile_channels: 每块的通道数
+        tile_samples: 每块的采样次数，默认为单个文件的采样次数
+        process: 写入前对（通道数，采样次数）数据逐通道的处理函数，如去趋势，按通道块调用
+        max_workers: 线程数
+        progress: 进度回调，参数为已转换的文件数与总文件数
+        cancelled: 返回是否取消的回调，每个通道块读取前检查
+
+    Returns: 转换得到的分块存储，取消时为 None
+
+    """
+    progress = progress or (lambda done, total: None)
+    cancelled = cancelled or (lambda: False)
+    if not files:
+        raise ValueError('没有可转换的文件')
+    infos = [probeHeader(file, is_scouter) for file in files]
+    channels_num, sampling_rate = infos[0]['channels_num'], infos[0]['sampling_rate']
+    for file, info in zip(files, infos):
+        if info['channels_num'] != channels_num or info['sampling_rate'] != sampling_rate:
+            raise ValueError(f'{os.path.basename(file)} 的采样率或通道数与 {os.path.basename(files[0])} 不一致')
+
+    # 先由文件头确定所有时间块的位置，各线程按全局编号写入
+    blocks, file_blocks, start = [], [], 0
+    for info in infos:
+        n = info['sampling_times']
+        step = tile_samples or n
+        file_blocks.append(len(blocks))
+        for i in range(0, n, step):
+            blocks.append([start + i, min(step, n - i)])
+        start += n
+
+    os.makedirs(path, exist_ok=True)
+    # 覆盖已有的分块存储时先删除旧描述文件，取消或出错后不会把新旧混合的块当作完整存储打开
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        os.remove(os.path.join(path, MANIFEST))
+
+    def convert(i: int) -> bool:
+        data = DATReader(files[i], is_scouter).data
+        for ci in range(0, channels_num, tile_channels):
+            if cancelled():
+                return False
+            rows = data[ci:ci + tile_channels]
+            rows = process(rows) if process is not None else rows
+            ti, offset = file_blocks[i], 0
+            while ti < len(blocks) and offset < rows.shape[1]:
+                length = blocks[ti][1]
+                tile = np.ascontiguousarray(rows[:, offset:offset + length], dtype=np.float32)
+                np.save(os.path.join(path, TileStore.tileName(ci // tile_channels, ti)), tile)
+                ti, offset = ti + 1, offset + length
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(convert, i) for i in range(len(files))]
+        for done, future in enumerate(as_completed(futures), 1):
+            if not future.result():
+                executor.shutdown(wait=True, cancel_futures=True)
+                return None
+            progress(done, len(files))
+    if cancelled():
+        return None
+
+    manifest = {
+        'channels_num': channels_num,
+        'sampling_rate': sampling_rate,
+        'sampling_times': start,
+        'tile_channels': tile_channels,
+        'is_scouter': bool(is_scouter),
+        'processed': process is not None,
+        'files': [{'name': os.path.basename(file),
+                   'time': info['time'].tolist(),
+                   'sampling_times': info['sampling_times']} for file, info in zip(files, infos)],
+        'blocks': blocks
+    }
+    with open(os.path.join(path, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)  # 描述文件最后写入，存在即表示转换完成
+    return TileStore(path)
+
+
+class TileStore:
+    """分块存储，读取任意通道与时间范围时只加载涉及的块"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 分块存储文件夹
+
+        """
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.channels_num = self.manifest['channels_num']
+        self.sampling_rate = self.manifest['sampling_rate']
+        self.sampling_times = self.manifest['sampling_times']
+        self.tile_channels = self.manifest['tile_channels']
+        self.files = self.manifest['files']
+        self.blocks = self.manifest['blocks']
+        self.block_starts = [block[0] for block in self.blocks]
+        self.file_starts = list(np.cumsum([0] + [file['sampling_times'] for file in self.files])[:-1])
+        self.shape = (self.channels_num, self.sampling_times)
+
+    @staticmethod
+    def tileName(channel_block: int, time_block: int) -> str:
+        """
+        块文件名
+        Args:
+            channel_block: 通道块编号
+            time_block: 时间块编号
+
+        Returns: 文件名
+
+        """
+        return f'c{channel_block:05d}_t{time_block:07d}.npy'
+
+    def read(self, channels: slice = slice(None), samples: slice = slice(None)) -> np.array:
+        """
+        读取数据，只加载与通道、时间范围相交的块
+        Args:
+            channels: 通道范围（从 0 开始，可带步长）
+            samples: 采样点范围（从 0 开始，不支持步长）
+
+        Returns: （通道数，采样次数）数据
+
+        """
+        channel_index = np.arange(*channels.indices(self.channels_num))
+        t0, t1, _ = samples.indices(self.sampling_times)
+        t1 = max(t0, t1)
+        data = np.empty((len(channel_index), t1 - t0), dtype=np.float32)
+        if not len(channel_index) or t0 == t1:
+            return data
+
+        first, last = bisect_right(self.block_starts, t0) - 1, bisect_right(self.block_starts, t1 - 1) - 1
+        channel_blocks = np.unique(channel_index // self.tile_channels)
+        for ti in range(first, last + 1):
+            start, length = self.blocks[ti]
+            a, b = max(t0, start), min(t1, start + length)  # 块与读取范围相交的部分
+            for ci in channel_blocks:
+                rows = (channel_index // self.tile_channels) == ci
+                tile = np.load(os.path.join(self.path, self.tileName(ci, ti)), mmap_mode='r')
+                data[rows, a - t0:b - t0] = tile[channel_index[rows] - ci * self.tile_channels, a - start:b - start]
+        return data
+
+    def filesInRange(self, samples: slice) -> List[dict]:
+        """
+        与采样点范围相交的原始文件信息
+        Args:
+            samples: 采样点范围
+
+        Returns: 文件信息，含文件名、GPS时间与采样次数
+
+        """
+        t0, t1, _ = samples.indices(self.sampling_times)
+        first = bisect_right(self.file_starts, t0) - 1
+        last = bisect_right(self.file_starts, max(t0, t1 - 1)) - 1
+        return self.files[max(first, 0):last + 1]
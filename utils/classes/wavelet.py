@@ -12,12 +12,10 @@ import pywt
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QScrollArea
-from matplotlib import pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from utils.function import xAxis, toAmplitude, initCombinedPlotWidget
 from utils.widget import ComboBox, Label, LineEdit, RadioButton, CheckBox, LineEditWithReg, PushButton, Dialog, \
-    MyPlotWidget
+    MyPlotWidget, TimeFrequencyWidget
 
 
 class CWTHandler:
@@ -137,17 +135,10 @@ class CWTHandler:
         t = xAxis(self.sampling_times, self.sampling_times_from, self.sampling_times_to, self.sampling_rate)
         coeff, fs = pywt.cwt(self.data, scales, self.wavelet, sampling_period=1. / self.sampling_rate)
 
-        figure = plt.figure()
-        plot_widget = FigureCanvas(figure)
-        ax = plt.gca()
-        ax.tick_params(axis='both', which='both', direction='in')
-        im = ax.pcolormesh(t, fs, np.abs(coeff), shading='gouraud')
-        ax.set_title('连续小波变换')
-        ax.set_xlabel('时间（s）')
-        ax.set_ylabel('频率（Hz）')
-        plt.colorbar(im, ax=ax, pad=0.2)
-        plt.xlim(self.sampling_times_from / self.sampling_rate, self.sampling_times_to / self.sampling_rate)
-        plt.ylim(0, self.sampling_rate / 2)
+        plot_widget = TimeFrequencyWidget('连续小波变换')
+        plot_widget.setMatrix(t, fs, np.abs(coeff), (self.sampling_times_from / self.sampling_rate,
+                                                     self.sampling_times_to / self.sampling_rate),
+                              (0, self.sampling_rate / 2))
         self.ret = plot_widget
 
     def run(self,
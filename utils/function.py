@@ -12,8 +12,9 @@ import numpy as np
 import soundfile
 from PyQt5.QtGui import QIcon, QColor
 from PyQt5.QtWidgets import QMessageBox, QWidget, QVBoxLayout
-from scipy.signal import detrend
+from scipy import fft
 
+from utils.classes.detrend import linearDetrend
 from utils.widget import MyPlotWidget
 
 
@@ -104,16 +105,16 @@ def writeWav(path: str, data: np.array, sr: int) -> None:
 
 def detrendData(data: np.array) -> np.array:
     """
-    去除信号的均值和线性趋势
+    去除信号的均值和线性趋势，可写的浮点数据原地修改，只读（如文件映射）或非浮点数据先复制
     Args:
-        data: 数据
+        data: （通道数，采样次数）数据
 
-    Returns: 去趋势后的数据
+    Returns: 去趋势后的数据，数据类型与输入相同，非浮点数据转为 float64
 
     """
-    data = detrend(data, axis=1, type='constant')
-    data = detrend(data, axis=1, type='linear')
-    return data
+    if not data.flags.writeable or data.dtype.kind != 'f':
+        data = np.array(data, dtype=data.dtype if data.dtype.kind == 'f' else np.float64)
+    return linearDetrend(data)
 
 
 def toAmplitude(data: np.array) -> np.array:
@@ -125,8 +126,9 @@ def toAmplitude(data: np.array) -> np.array:
     Returns: 数据幅值
 
     """
-    data = np.abs(np.fft.fft(data)) * 2.0 / len(data)
-    return data[:len(data) // 2]
+    num = len(data)
+    data = np.abs(fft.rfft(data)) * 2.0 / num  # 实数 fft，float32 数据不会被提升为 float64
+    return data[:num // 2]
 
 
 def xAxis(num: int,
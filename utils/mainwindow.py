@@ -5,28 +5,38 @@
 @File    : mainwindow.py
 """
 import ctypes
+import heapq
+import math
 import os.path
 import re
 import sys
-from itertools import cycle
+from bisect import bisect_right
 
-import pandas as pd
 from PyQt5 import QtMultimedia
-from PyQt5.QtCore import QUrl, QEvent
+from PyQt5.QtCore import QUrl, QEvent, QFileSystemWatcher, QTimer
 from PyQt5.QtGui import QTransform
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, qApp, QTabWidget, QTableWidget, QAbstractItemView, \
-    QTableWidgetItem, QHeaderView, QTabBar, QScrollBar, QHBoxLayout
+    QTableWidgetItem, QHeaderView, QTabBar, QScrollBar, QHBoxLayout, QProgressDialog
 from matplotlib import pyplot as plt
 from scipy.integrate import cumulative_trapezoid
 
 from image.image import *
 from .classes.binary_image import BinaryImageHandler
+from .classes.catalog import Catalog, parseGPSTime, gpsTime, gpsTimestamp
+from .classes.cache import DecodeCache
+from .classes.das_array import DASArray
 from .classes.data_sifting import DataSifting
 from .classes.emd import EMDHandler
 from .classes.feature import FeatureCalculator
 from .classes.filter import FilterHandler
+from .classes.image_pyramid import ImagePyramid, PYRAMID_METHODS
+from .classes.exporter import exportFile
+from .classes.ring_buffer import RingBuffer
+from .classes.reader import readFiles, readSegments, ScouterConverter, Prefetcher, ACQUISITION_MODES, FIBER_TYPES, \
+    formatGPSTime, probeHeader
 from .classes.snr import SNRCalculator
 from .classes.spectrum import SpectrumHandler
+from .classes.tile_store import TileStore, convertToTileStore
 from .classes.wavelet import DWTHandler, CWTHandler
 from .classes.wavelet_packet import DWPTHandler
 from .function import *
@@ -35,6 +45,9 @@ from .widget import *
 
 class MainWindow(QMainWindow):
     """主窗口"""
+    file_table_headers = ['文件', 'GPS时间', '采样率', '通道数', '时长（s）', '采集模式']  # 文件列表表头
+    lazy_image_columns = 8192  # 数据超出内存上限时，灰度图最多读取的采样点数
+    tiled_image_bytes = 64 * 1024 ** 2  # 数据超过该大小时，灰度图与热力图使用分块图像金字塔
 
     def __init__(self):
         """
@@ -88,14 +101,76 @@ class MainWindow(QMainWindow):
         # 文件读取格式
         self.is_scouter = False
 
+        # 计算精度，float32 时读取、去趋势与后续计算都保持 float32，内存减半
+        self.dtype = np.float64
+
+        # 是否把 scouter 文件转换为按通道存储的缓存，及后台转换器
+        self.scouter_cache = False
+        self.scouter_converter = None
+
         # 数据采集参数
         self.acquisition_params = {}
 
+        # 后台导出与转换分块存储
+        self.export_worker = None
+        self.tile_store_worker = None
+
+        # 灰度图与热力图的图像金字塔降采样方式，及正在后台建立金字塔的线程
+        self.image_pyramid_method = 'maxabs'
+        self.image_workers = []
+
+        # 当前文件夹的文件头索引，文件列表当前显示的内容，及其对应的（文件夹，读取模式）
+        self.catalog = None
+        self.file_table_rows = None
+        self.file_infos = []
+        self.file_common_params = None  # 多数文件的（采样率，通道数）
+        self.file_table_names = set()  # 文件列表中显示的文件名
+        self.file_list_key = None
+        self.file_growing = {}  # 加入文件列表后大小仍可能变化的文件及其上次检查时的大小
+
+        # 监视当前文件夹，变化后稍等再增量更新文件列表，合并短时间内的多次变化；按 F5 或切换文件夹时才完整扫描
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_timer = QTimer(self)
+        self.file_timer.setSingleShot(True)
+        self.file_timer.setInterval(500)
+        self.file_timer.timeout.connect(lambda: self.live_tail or self.syncFiles())  # 实时跟踪时由其自行处理
+        self.file_watcher.directoryChanged.connect(lambda: self.file_timer.start())
+
         # 每次打开程序初始化的参数
         self.channel_number = 1  # 当前通道
         self.channel_number_step = 1  # 通道号递增减步长
         self.files_read_number = 1  # 表格连续读取文件数
 
+        # 打开的分块存储，为 None 时从 .dat 文件读取
+        self.store = None
+
+        # 按GPS时间读取的（起始，终止）时间戳，为 None 时按表格选中的文件读取
+        self.gps_window = None
+
+        # 实时跟踪：监视文件夹，新文件写完后追加到固定文件数的滑动窗口
+        self.live_tail = False
+        self.live_watcher = None
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(1000)  # 文件夹变化后等待文件写完的检查间隔，ms
+        self.live_timer.timeout.connect(self.checkLiveFiles)
+        self.live_sizes = {}  # 待追加文件上次检查时的大小，大小不再变化才读取
+        self.live_pending = set()  # 开始跟踪时已在文件列表中、但仍需等待写完的文件
+
+        # 已读取文件的缓存，表格中重叠的文件不重复读取和去趋势
+        self.decode_cache = DecodeCache(2 * 1024 ** 3)
+        # 整体读入内存的数据上限，超过时改为按需读取的 DASArray，与缓存大小相互独立
+        self.memory_budget = 2 * 1024 ** 3
+
+        # 后台预读表格中接下来的文件，及上次选中的行，用于判断浏览方向
+        self.prefetcher = Prefetcher(self.decode_cache)
+        self.last_item_index = None
+
+        # 读取的通道范围，切换文件时保持不变，只从磁盘读取这些通道
+        self.channel_from_num = 1
+        self.channel_to_num = None  # 为 None 时读取全部通道
+        self.channel_step_num = 1
+
         # 滤波器是否更新数据
         self.update_data = False
 
@@ -161,6 +236,39 @@ class MainWindow(QMainWindow):
                                     self.exportData,
                                     shortcut='Ctrl+E')
 
+        # 文件-刷新文件列表
+        self.refresh_files_action = Action(self.file_menu,
+                                           '刷新文件列表',
+                                           '重新扫描当前文件夹，更新文件列表，文件夹变化时也会自动刷新',
+                                           self.refreshFiles,
+                                           shortcut='F5')
+
+        self.file_menu.addSeparator()
+
+        # 文件-转换为分块存储
+        self.convert_tile_store_action = Action(self.file_menu,
+                                                '转换为分块存储',
+                                                '把当前文件夹的所有文件转换为分块存储，之后可快速读取任意通道与时间范围',
+                                                self.convertTileStore)
+
+        # 文件-打开分块存储
+        self.open_tile_store_action = Action(self.file_menu,
+                                             '打开分块存储',
+                                             '打开分块存储并读取选定的时间范围',
+                                             self.openTileStore)
+
+        # 文件-按GPS时间读取
+        self.read_gps_window_action = Action(self.file_menu,
+                                             '按GPS时间读取',
+                                             '读取当前文件夹中GPS时间范围内的数据，只读取覆盖该范围的文件中的相应部分',
+                                             self.readGPSWindowDialog)
+
+        # 文件-实时跟踪
+        self.live_tail_action = Action(self.file_menu,
+                                       '实时跟踪（否）',
+                                       '如果为是，监视当前文件夹，新文件写完后自动追加显示，只保留最近的若干个文件',
+                                       self.changeLiveTail)
+
         self.file_menu.addSeparator()
 
         # 文件-读取模式
@@ -169,6 +277,18 @@ class MainWindow(QMainWindow):
                                        '改变读取模式，在普通与新模式（scouter 采集）之间变更',
                                        self.changeReadMode)
 
+        # 文件-scouter 缓存
+        self.scouter_cache_action = Action(self.file_menu,
+                                           'scouter 缓存（否）',
+                                           '如果为是，scouter 模式下会在后台将文件转换为按通道存储的缓存，之后读取更快',
+                                           self.changeScouterCache)
+
+        # 文件-计算精度
+        self.precision_action = Action(self.file_menu,
+                                       '计算精度：float64',
+                                       '改变计算精度，在 float64 与 float32 之间变更，float32 占用内存减半，已读取的数据会重新读取',
+                                       self.changePrecision)
+
         # 显示当前数据采集参数
         self.show_aquisition_params_action = Action(self.file_menu,
                                                     '采集参数',
@@ -223,6 +343,12 @@ class MainWindow(QMainWindow):
                                                       '设置从表格选中文件时的读取数量，从选中的文件开始算起',
                                                       self.changeFilesReadNumberDialog)
 
+        # 操作-设置缓存大小
+        self.change_cache_size_action = Action(self.operation_menu,
+                                               '设置缓存大小',
+                                               '设置已读取文件缓存的内存上限，以及整体读入内存的数据上限',
+                                               self.changeCacheSizeDialog)
+
         # 绘图
         self.plot_menu = Menu(self.menu_bar, '绘图', enabled=False)
 
@@ -267,6 +393,12 @@ class MainWindow(QMainWindow):
                                           '绘制热力图',
                                           self.plotHeatMapImage)
 
+        # 绘图-瀑布图降采样方式
+        self.image_pyramid_method_action = Action(self.plot_menu,
+                                                  f'瀑布图降采样：{PYRAMID_METHODS["maxabs"]}',
+                                                  '数据较大时灰度图与热力图按视图降采样显示，在最大绝对值与均方根之间变更',
+                                                  self.changeImagePyramidMethod)
+
         # 绘图-多通道云图
         self.plot_multichannel_image_action = Action(self.plot_menu,
                                                      '多通道云图',
@@ -413,12 +545,13 @@ class MainWindow(QMainWindow):
 
         file_table_scrollbar = QScrollBar(Qt.Vertical)
         file_table_scrollbar.setStyleSheet('min-height: 100')  # 设置滚动滑块的最小高度
-        self.files_table_widget = QTableWidget(30, 1)
+        self.files_table_widget = QTableWidget(30, len(self.file_table_headers))
         self.files_table_widget.setVerticalScrollBar(file_table_scrollbar)
         self.files_table_widget.setStyleSheet('font-size: 17px; font-family: "Times New Roman", "Microsoft YaHei";')
         self.files_table_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)  # 设置表格不可编辑
-        self.files_table_widget.setHorizontalHeaderLabels(['文件'])  # 设置表头
-        self.files_table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.files_table_widget.setHorizontalHeaderLabels(self.file_table_headers)  # 设置表头
+        self.files_table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.files_table_widget.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         QTableWidget.resizeRowsToContents(self.files_table_widget)
         QTableWidget.resizeColumnsToContents(self.files_table_widget)  # 设置表格排与列的宽度随内容改变
         self.files_table_widget.setSelectionBehavior(QAbstractItemView.SelectRows)  # 设置一次选中一排内容
@@ -553,8 +686,6 @@ class MainWindow(QMainWindow):
         self.hasWavFile = False  # 当前通道是否已创建了音频文件
 
         # 数据范围
-        self.channel_from_num = 1
-        self.channel_to_num = self.channels_num
         self.sampling_times_from_num = 1
         self.sampling_times_to_num = self.sampling_times
 
@@ -573,7 +704,20 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, '提示', '是否退出？', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         # 判断返回值，如果点击的是Yes按钮，我们就关闭组件和应用，否则就忽略关闭事件
-        event.accept() if reply == QMessageBox.Yes else event.ignore()
+        if reply == QMessageBox.Yes:
+            if self.scouter_converter:
+                self.scouter_converter.shutdown()  # 取消未开始的缓存转换
+            self.prefetcher.shutdown()
+            self.stopLiveTail()
+            for worker in self.image_workers:
+                worker.cancel()
+                worker.wait()
+            if self.tile_store_worker is not None:
+                self.tile_store_worker.cancel()  # 未写入描述文件的分块存储不会被打开
+                self.tile_store_worker.wait()
+            event.accept()
+        else:
+            event.ignore()
 
     def removeTab(self, index: int):
         """
@@ -584,6 +728,7 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
+        self.clearImage(self.tab_widget.widget(index))
         self.tab_widget.removeTab(index)
 
     # """------------------------------------------------------------------------------------------------------------"""
@@ -661,15 +806,96 @@ class MainWindow(QMainWindow):
 
         """
         self.plot_gray_scale_widget.clear()
+        self.gray_scale_image_item = self.drawImage(self.plot_gray_scale_widget, self.sampling_times_from_num - 1)
+
+    def drawImage(self, plot_widget: MyPlotWidget, x_offset: int, colormap: str = None) -> Optional[pg.ImageItem]:
+        """
+        绘制灰度图或热力图
+        数据较小时整体绘制；较大时先绘制等间隔抽取的预览，同时在后台建立图像金字塔，建立后只绘制可见范围内合适分辨率的图块
+        Args:
+            plot_widget: 绘图组件
+            x_offset: 第一个采样点的序号
+            colormap: 颜色映射名称，默认为灰度
+
+        Returns: 整体绘制时为图像，否则为 None
+
+        """
+        self.clearImage(plot_widget)
+        data, step = self.data, 1
+        tiled = isinstance(data, DASArray) or data.nbytes > self.tiled_image_bytes
+        if tiled:
+            step = max(math.ceil(data.shape[1] / self.lazy_image_columns), 1)  # 预览只读取等间隔的部分采样点
+            data = np.asarray(data[:, ::step])
 
         tr = QTransform()
-        tr.scale(1 / self.sampling_rate, 1)  # 缩放
-        tr.translate(self.sampling_times_from_num - 1, 0)  # 移动
+        tr.scale(step / self.sampling_rate, 1)  # 缩放
+        tr.translate(x_offset / step, 0)  # 移动
 
         item = pg.ImageItem()
-        item.setImage(self.data.T)
+        if colormap is not None:
+            item.setColorMap(colormap)
+        item.setImage(data.T)
         item.setTransform(tr)
-        self.plot_gray_scale_widget.addItem(item)
+        plot_widget.addItem(item)
+        if not tiled:
+            return item
+
+        pyramid = ImagePyramid(self.data, self.image_pyramid_method)
+        worker = Worker(pyramid.build)
+        worker.result.connect(lambda finished: finished and self.showTiledImage(plot_widget, worker, pyramid, item,
+                                                                                x_offset, colormap))
+        worker.error.connect(printError)
+        worker.finished.connect(lambda: self.image_workers.remove(worker))
+        plot_widget.image_worker = worker
+        self.image_workers.append(worker)
+        worker.start()
+        return None
+
+    def showTiledImage(self,
+                       plot_widget: MyPlotWidget,
+                       worker: Worker,
+                       pyramid: ImagePyramid,
+                       preview: pg.ImageItem,
+                       x_offset: int,
+                       colormap: Optional[str]):
+        """
+        图像金字塔建立后，以图块替换预览
+        Args:
+            plot_widget: 绘图组件
+            worker: 建立金字塔的线程
+            pyramid: 建立完成的图像金字塔
+            preview: 预览图像
+            x_offset: 第一个采样点的序号
+            colormap: 颜色映射名称
+
+        Returns:
+
+        """
+        if getattr(plot_widget, 'image_worker', None) is not worker:  # 已重新绘制
+            return
+        plot_widget.image_worker = None
+        plot_widget.removeItem(preview)
+        plot_widget.tiled_image = TiledImage(plot_widget.getPlotItem(), pyramid, 1 / self.sampling_rate, x_offset,
+                                             colormap)
+
+    @staticmethod
+    def clearImage(plot_widget: QWidget):
+        """
+        停止建立图像金字塔并移除图块
+        Args:
+            plot_widget: 绘图组件
+
+        Returns:
+
+        """
+        worker = getattr(plot_widget, 'image_worker', None)
+        if worker is not None:
+            worker.cancel()
+            plot_widget.image_worker = None
+        tiled_image = getattr(plot_widget, 'tiled_image', None)
+        if tiled_image is not None:
+            tiled_image.clear()
+            plot_widget.tiled_image = None
 
     def plotSingleChannelTime(self):
         """
@@ -700,6 +926,27 @@ class MainWindow(QMainWindow):
         x = xAxis(self.current_sampling_times, sampling_rate=self.sampling_rate, freq=True)
         self.plot_amplitude_frequency_widget.draw(x, data, pen=QColor('blue'))
 
+    def updateLiveImages(self):
+        """
+        实时跟踪时更新灰度图与单通道图，只更新已有图像与曲线的数据，不清空重绘，灰度图保持首次绘制时的色阶
+        Returns:
+
+        """
+        item = getattr(self, 'gray_scale_image_item', None)
+        if item is None or item.scene() is None:
+            self.updateImages()
+            return
+        item.setImage(self.data.T, autoLevels=False)
+
+        data = self.data[self.channel_number - 1]
+        x = xAxis(self.current_sampling_times,
+                  self.sampling_times_from_num,
+                  self.sampling_times_to_num,
+                  self.sampling_rate)
+        self.plot_single_channel_time_widget.updatePlot(x, data)
+        x = xAxis(self.current_sampling_times, sampling_rate=self.sampling_rate, freq=True)
+        self.plot_amplitude_frequency_widget.updatePlot(x, toAmplitude(data))
+
     # """------------------------------------------------------------------------------------------------------------"""
     """文件路径区和文件列表调用函数"""
 
@@ -711,6 +958,7 @@ class MainWindow(QMainWindow):
         """
         file_path = QFileDialog.getExistingDirectory(self, '设置文件路径', '')  # 起始路径
         if file_path != '':
+            self.stopLiveTail()
             self.file_path = file_path
             self.updateFile()
 
@@ -720,6 +968,7 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
+        self.stopLiveTail()  # 手动选择文件时停止实时跟踪
         self.file_names = []
         item_index = self.files_table_widget.currentIndex().row()  # 获取当前点击的文件行索引
         for i in range(self.files_read_number):
@@ -727,9 +976,37 @@ class MainWindow(QMainWindow):
                 break
             self.file_names.append(self.files_table_widget.item(item_index + i, 0).text())
 
-        self.readData()
+        try:
+            if not self.slideData():
+                self.readData()
+        except Exception as err:
+            printError(err)
+            return
         self.initLocalParams()
         self.updateAll()
+        self.prefetchFiles(item_index)
+
+    def prefetchFiles(self, item_index: int):
+        """
+        根据浏览方向在后台预读接下来的文件，向下浏览时预读之后的文件，向上浏览时预读之前的文件
+        Args:
+            item_index: 当前选中的行索引
+
+        Returns:
+
+        """
+        if self.last_item_index is None or item_index >= self.last_item_index:
+            rows = range(item_index + self.files_read_number,
+                         min(item_index + 2 * self.files_read_number, self.files_table_widget.rowCount()))
+        else:
+            rows = range(item_index - 1, max(item_index - self.files_read_number, 0) - 1, -1)
+        self.last_item_index = item_index
+
+        files = [os.path.join(self.file_path, self.files_table_widget.item(i, 0).text()) for i in rows]
+        selected = [os.path.join(self.file_path, file) for file in self.file_names]
+        self.prefetcher.prefetch(files, self.is_scouter, self.read_channels, self.scouter_cache, self.dtype,
+                                 detrendData, selected)
+        self.convertScouterFiles(selected + files)  # 只转换正在浏览与即将浏览的文件
 
     def changeChannelNumber(self):
         """
@@ -757,18 +1034,164 @@ class MainWindow(QMainWindow):
         self.player_play_button.setDisabled(False)
         self.player_stop_button.setDisabled(False)  # 设置播放按钮
 
-    def updateFile(self):
+    def refreshFiles(self):
+        """
+        重新扫描当前文件夹并更新文件列表
+        Returns:
+
+        """
+        if hasattr(self, 'file_path'):
+            self.updateFile()
+
+    def updateFile(self, rescan: bool = True):
         """
         更新文件列表显示
+        Args:
+            rescan: 是否重新扫描文件夹，否则只在文件夹或读取模式改变后扫描
+
         Returns:
 
         """
         self.file_path_line_edit.setText(self.file_path)
-        files = [f for f in os.listdir(self.file_path) if f.endswith('.dat')]
-        self.files_table_widget.setRowCount(len(files))  # 有多少个文件就显示多少行
-        for i in range(len(files)):
-            table_widget_item = QTableWidgetItem(files[i])
-            self.files_table_widget.setItem(i, 0, table_widget_item)
+        key = (self.file_path, bool(self.is_scouter))
+        if not rescan and key == self.file_list_key:
+            return
+        if self.catalog is None or self.catalog.directory != self.file_path:
+            if self.catalog is not None:
+                self.catalog.close()
+            self.catalog = Catalog(self.file_path)
+            if self.file_watcher.directories():
+                self.file_watcher.removePaths(self.file_watcher.directories())
+            self.file_watcher.addPath(self.file_path)
+        self.catalog.refresh(self.is_scouter)  # 只重新读取新增或修改的文件的文件头
+        infos = self.file_infos = self.catalog.files(self.is_scouter)
+        self.file_growing = {}
+        self.file_list_key = key
+
+        rows = [(info['name'], info['start'], info['sampling_rate'], info['channels_num'], info['sampling_time'])
+                for info in infos]
+        if rows == self.file_table_rows:
+            return  # 文件没有变化时不重建表格
+        self.file_table_rows = rows
+        self.file_table_names = {info['name'] for info in infos}
+
+        # 采样率与通道数与多数文件不一致的文件标红
+        params = [(info['sampling_rate'], info['channels_num']) for info in infos if info['valid']]
+        self.file_common_params = max(set(params), key=params.count) if params else None
+
+        self.files_table_widget.setRowCount(len(infos))  # 有多少个文件就显示多少行
+        for i, info in enumerate(infos):
+            self.setFileRow(i, info)
+
+    def syncFiles(self):
+        """
+        文件夹变化后增量更新文件列表：只列出文件名，新文件读取文件头后追加到末尾，已删除的文件从列表移除
+        新加入的文件可能仍在写入，大小变化时重新读取文件头并更新该行，直到大小不再变化
+        Returns:
+
+        """
+        if not hasattr(self, 'file_path') or self.catalog is None or self.catalog.directory != self.file_path:
+            return
+        try:
+            with os.scandir(self.file_path) as entries:
+                names = {entry.name for entry in entries if entry.name.endswith('.dat') and entry.is_file()}
+        except OSError as err:
+            printError(err)
+            return
+        removed = self.file_table_names - names
+        if removed:
+            self.catalog.remove(list(removed), self.is_scouter)
+            self.removeFileRows(removed)
+
+        sizes = {}
+        for name in sorted(names - self.file_table_names) + [name for name in self.file_growing if name in names]:
+            try:
+                sizes[name] = os.path.getsize(os.path.join(self.file_path, name))
+            except OSError:
+                continue
+        changed = [name for name in sizes if self.file_growing.get(name) != sizes[name]]
+        self.file_growing = {name: sizes[name] for name in changed}
+        if not changed:
+            return
+        self.file_timer.start()  # 大小不再变化之前继续检查
+        infos = self.catalog.add(changed, self.is_scouter)
+        rows = {info['name']: i for i, info in enumerate(self.file_infos) if info['name'] in self.file_growing}
+        for info in infos:
+            if info['name'] in rows:
+                i = rows[info['name']]
+                self.file_infos[i] = info
+                self.file_table_rows[i] = (info['name'], info['start'], info['sampling_rate'], info['channels_num'],
+                                           info['sampling_time'])
+                self.setFileRow(i, info)
+        self.appendFileRows(infos)
+
+    def removeFileRows(self, names: set):
+        """
+        从文件列表中移除给出的文件，不重建表格
+        Args:
+            names: 文件名
+
+        Returns:
+
+        """
+        for i in reversed(range(len(self.file_infos))):
+            if self.file_infos[i]['name'] in names:
+                self.files_table_widget.removeRow(i)
+                del self.file_infos[i]
+                del self.file_table_rows[i]
+        self.file_table_names.difference_update(names)
+
+    def setFileRow(self, i: int, info: dict):
+        """
+        显示文件列表的一行，采样率或通道数与多数文件不一致、或文件头无法读取的文件标红
+        Args:
+            i: 行索引
+            info: 文件信息
+
+        Returns:
+
+        """
+        if not info['valid']:
+            row = [info['name']] + ['-'] * (len(self.file_table_headers) - 1)
+        else:
+            row = [info['name'],
+                   formatGPSTime(info['time']),
+                   str(info['sampling_rate']),
+                   str(info['channels_num']),
+                   f'{info["sampling_time"]:g}',
+                   info['acquisition_mode']]
+        mismatched = not info['valid'] or (info['sampling_rate'], info['channels_num']) != self.file_common_params
+        for j, text in enumerate(row):
+            table_widget_item = QTableWidgetItem(text)
+            if mismatched:
+                table_widget_item.setBackground(QColor('pink'))
+                table_widget_item.setToolTip('采样率或通道数与其他文件不一致' if info['valid'] else '文件头无法读取')
+            self.files_table_widget.setItem(i, j, table_widget_item)
+
+    def appendFileRows(self, infos: list):
+        """
+        在文件列表末尾加入新文件，不扫描文件夹也不重建表格，已显示的文件被跳过
+        Args:
+            infos: 新文件的信息
+
+        Returns:
+
+        """
+        infos = [info for info in infos if info['name'] not in self.file_table_names]
+        if not infos:
+            return
+        if self.file_common_params is None:
+            params = [(info['sampling_rate'], info['channels_num']) for info in infos if info['valid']]
+            self.file_common_params = max(set(params), key=params.count) if params else None
+        count = self.files_table_widget.rowCount()
+        self.files_table_widget.setRowCount(count + len(infos))
+        for i, info in enumerate(infos):
+            self.setFileRow(count + i, info)
+        self.file_infos.extend(infos)
+        self.file_table_names.update(info['name'] for info in infos)
+        self.file_table_rows = self.file_table_rows or []
+        self.file_table_rows.extend((info['name'], info['start'], info['sampling_rate'], info['channels_num'],
+                                     info['sampling_time']) for info in infos)
 
     def updateDataRange(self):
         """
@@ -776,8 +1199,7 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
-        self.data = self.origin_data[self.channel_from_num - 1:self.channel_to_num,
-                    self.sampling_times_from_num - 1:self.sampling_times_to_num]
+        self.data = self.origin_data[:, self.sampling_times_from_num - 1:self.sampling_times_to_num]  # 通道范围已在读取时选定
 
     def updateDataParams(self):
         """
@@ -785,7 +1207,7 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
-        self.current_channels = self.channel_to_num - self.channel_from_num + 1
+        self.current_channels = self.origin_data.shape[0]
         self.current_sampling_times = self.sampling_times_to_num - self.sampling_times_from_num + 1
 
         self.channel_number_spinbx.setRange(1, self.current_channels)
@@ -800,13 +1222,7 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
-
-        def f(s):
-            return list(map(str, map(int, s[:5]))) + [str(s[5])]
-
-        from_time, to_time = f(self.time[0]), f(self.time[-1])
-        from_time = ' - '.join(from_time)
-        to_time = ' - '.join(to_time)
+        from_time, to_time = formatGPSTime(self.time[0], ' - '), formatGPSTime(self.time[-1], ' - ')
 
         self.gps_from_line_edit.setText(from_time)  # 更新开头文件GPS时间
         self.gps_to_line_edit.setText(to_time)  # 更新末尾文件GPS时间
@@ -828,7 +1244,7 @@ class MainWindow(QMainWindow):
 
         """
         self.updateWidgetsState()
-        self.updateFile()
+        self.updateFile(rescan=False)  # 文件夹的变化由监视器处理，不在每次操作时扫描
         self.updateDataRange()
         self.updateDataParams()
         self.updateDataGPSTime()
@@ -845,10 +1261,15 @@ class MainWindow(QMainWindow):
         """
         file_names = QFileDialog.getOpenFileNames(self, '导入', '', 'DAS data (*.dat)')[0]  # 打开多个.dat文件
         if file_names:
+            self.stopLiveTail()
             self.file_names = file_names
             self.file_path = os.path.dirname(self.file_names[0])
 
-            self.readData()
+            try:
+                self.readData()
+            except Exception as err:
+                printError(err)
+                return
             self.initLocalParams()
             self.updateAll()
 
@@ -858,29 +1279,36 @@ class MainWindow(QMainWindow):
         Returns:
 
         """
+        self.store, self.gps_window = None, None
+        files = [os.path.join(self.file_path, file) for file in self.file_names]
+        # 通道数与数据大小由文件列表的索引得到，之后读取数据时才解析文件头，不在索引中的文件才单独读取文件头
+        indexed = {}
+        if self.catalog is not None and self.catalog.directory == self.file_path:
+            indexed = {info['name']: info for info in self.catalog.lookup(self.file_names, self.is_scouter)
+                       if info['valid']}
+        headers = [indexed.get(name) or probeHeader(os.path.join(self.file_path, name), self.is_scouter)
+                   for name in self.file_names]
+        channels_num = headers[0]['channels_num']
+        if self.channel_to_num is None or not 1 <= self.channel_from_num <= self.channel_to_num <= channels_num:
+            self.channel_from_num, self.channel_to_num, self.channel_step_num = 1, channels_num, 1  # 范围不适用时读取全部通道
+        channels = slice(self.channel_from_num - 1, self.channel_to_num, self.channel_step_num)
+        self.read_channels = channels
+
+        self.prefetcher.cancel()  # 前台读取优先
+        nbytes = len(range(*channels.indices(channels_num))) * np.dtype(self.dtype).itemsize * \
+            sum(header['sampling_times'] for header in headers)
+        if nbytes > self.memory_budget:
+            # 超出读入内存上限时不读取数据，只在索引时读取用到的部分
+            data = DASArray(files, self.is_scouter, channels, use_sidecar=self.scouter_cache, dtype=self.dtype)
+            readers = data.readers
+        else:
+            readers, data = readFiles(files, self.is_scouter, channels, use_sidecar=self.scouter_cache,
+                                      dtype=self.dtype, process=detrendData, cache=self.decode_cache)  # 逐个文件去趋势
+        reader = readers[-1]
+        time = [x.time for x in readers]  # GPS时间
+        raw_data, channels_num = reader.header, reader.channels_num
 
-        def f(s):
-            return list(map(str, map(int, s[:5]))) + [str(s[5])]
-
-        time, data = [], []
-        raw_data = np.fromfile(os.path.join(self.file_path, self.file_names[0]), dtype='<f4')
         if self.is_scouter:
-            channels_num = int(raw_data[16])  # 传感点数
-            for file in self.file_names:
-                raw_data = np.fromfile(os.path.join(self.file_path, file), dtype='<f4')
-                time.append(raw_data[:6])  # GPS时间
-                data.append(raw_data[64:].reshape(channels_num, -1, order='F'))
-            acquisition_modes = {
-                1.: 'CNTE 连续模式',
-                2.: 'PTRI 预触发模式',
-                3.: 'WTRI 等待触发模式'
-            }
-
-            fiber_types = {
-                1.: 'SMF 单模光纤',
-                2.: 'MMF 多模光纤',
-                3.: 'MSF 微结构光纤'
-            }
             acquisition_mode = raw_data[6]  # 采集模式
             fiber_type = raw_data[7]  # 光纤类型
             physical_fiber_length = raw_data[8]  # 光纤长度，m
@@ -906,9 +1334,9 @@ class MainWindow(QMainWindow):
             trigger_interval = raw_data[29]  # 触发间隔，s
 
             self.acquisition_params = {
-                'GPS时间': f'{"-".join(f(time[0]))} 至 {"-".join(f(time[-1]))}',
-                '采集模式': f'{acquisition_modes[acquisition_mode]}',
-                '光纤类型': f'{fiber_types[fiber_type]}',
+                'GPS时间': f'{formatGPSTime(time[0])} 至 {formatGPSTime(time[-1])}',
+                '采集模式': f'{ACQUISITION_MODES[acquisition_mode]}',
+                '光纤类型': f'{FIBER_TYPES[fiber_type]}',
                 '光纤长度': f'{physical_fiber_length:.3f}m',
                 '反射率': f'{refractive_index:.3f}',
                 '采样频率': f'{sampling_rate}Hz',
@@ -934,49 +1362,153 @@ class MainWindow(QMainWindow):
             }
 
         else:
-            sampling_rate, channels_num = int(raw_data[6]), int(raw_data[9])  # 采样率，通道数
-            sampling_time = (len(raw_data) - 10) // channels_num
-            for file in self.file_names:
-                raw_data = np.fromfile(os.path.join(self.file_path, file), dtype='<f4')
-                time.append(raw_data[:6])  # GPS时间
-                data.append(raw_data[10:].reshape(channels_num, -1))
+            sampling_rate, sampling_time = reader.sampling_rate, reader.sampling_times  # 采样率，单个文件采样点数
 
             self.acquisition_params = {
-                'GPS时间': f'{"-".join(f(time[0]))} 至 {"-".join(f(time[-1]))}',
+                'GPS时间': f'{formatGPSTime(time[0])} 至 {formatGPSTime(time[-1])}',
                 '采样频率': f'{sampling_rate}Hz',
                 '传感点数（通道数）': f'{channels_num}',
                 '单个文件采样点数': f'{sampling_time}',
             }
 
         self.time = time
-        self.data = detrendData(np.concatenate(data, axis=1))  # （通道数，采样次数）
+        if isinstance(data, DASArray):
+            self.ring_buffer = None
+            self.data = data
+        else:
+            self.ring_buffer = RingBuffer(data, [x.sampling_times for x in readers])  # 表格中逐个文件移动时只读取新文件
+            self.data = self.ring_buffer.data  # （通道数，采样次数）
+        self.loaded_file_names = list(self.file_names)
+        self.loaded_key = (self.file_path, bool(self.is_scouter), channels)
         self.origin_data = self.data
         self.sampling_rate = sampling_rate
         self.channels_num = channels_num
         self.sampling_times = self.data.shape[1]
         self.acquisition_params['总采样点数'] = f'{self.sampling_times}'
 
+    def reloadData(self):
+        """
+        按当前设置重新读取数据，数据来源为分块存储或 .dat 文件
+        Returns:
+
+        """
+        if self.store is not None:
+            self.readStore()
+        elif self.gps_window is not None:
+            self.readGPSWindow()
+        else:
+            self.readData()
+
+    def slideData(self) -> bool:
+        """
+        选中的文件相比已读取的文件只向前或向后移动了一个时，只读取新文件并在滑动窗口两端增删，不重新读取所有文件
+        Returns: 是否以滑动方式更新了数据
+
+        """
+        if getattr(self, 'ring_buffer', None) is None or \
+                self.loaded_key != (self.file_path, bool(self.is_scouter), self.read_channels):
+            return False
+
+        old, new = self.loaded_file_names, self.file_names
+        if len(old) != len(new) or old == new:
+            return False
+        if old[1:] == new[:-1]:
+            file, forward = new[-1], True
+        elif old[:-1] == new[1:]:
+            file, forward = new[0], False
+        else:
+            return False
+
+        return self.slideFile(file, forward)
+
+    def slideFile(self, file: str, forward: bool = True) -> bool:
+        """
+        读取一个文件加入滑动窗口的一端，窗口文件数达到上限时丢弃另一端的文件
+        Args:
+            file: 文件名
+            forward: 是否加入末尾，否则加入开头
+
+        Returns: 是否加入，采样率或通道数与已读取的数据不一致时不加入
+
+        """
+        readers, block = readFiles([os.path.join(self.file_path, file)], self.is_scouter, self.read_channels,
+                                   use_sidecar=self.scouter_cache, dtype=self.dtype, process=detrendData,
+                                   cache=self.decode_cache)
+        reader = readers[0]
+        if reader.channels_num != self.channels_num or reader.sampling_rate != self.sampling_rate:
+            return False
+
+        full = int(len(self.ring_buffer.lengths) >= self.ring_buffer.maxlen)  # 是否需要丢弃另一端的文件
+        if forward:
+            self.ring_buffer.append(block)
+            self.time = self.time[full:] + [reader.time]
+            self.loaded_file_names = self.loaded_file_names[full:] + [file]
+        else:
+            self.ring_buffer.appendleft(block)
+            self.time = [reader.time] + self.time[:len(self.time) - full]
+            self.loaded_file_names = [file] + self.loaded_file_names[:len(self.loaded_file_names) - full]
+        self.file_names = list(self.loaded_file_names)
+
+        self.data = self.ring_buffer.data
+        self.origin_data = self.data
+        self.sampling_times = self.data.shape[1]
+        self.acquisition_params['GPS时间'] = f'{formatGPSTime(self.time[0])} 至 {formatGPSTime(self.time[-1])}'
+        self.acquisition_params['总采样点数'] = f'{self.sampling_times}'
+        return True
+
     def exportData(self):
         """
-        导出数据
+        导出数据，在后台线程中按通道分块写入，可查看进度并取消
         Returns:
 
         """
         fpath, ftype = QFileDialog.getSaveFileName(self, '导出', '', 'csv(*.csv);;json(*.json);;pickle(*.pickle);;'
-                                                                     'txt(*.txt);;xls(*.xls *.xlsx)')
-
-        data = pd.DataFrame(self.data)  # 保存为df
+                                                                     'txt(*.txt);;xls(*.xls *.xlsx);;npy(*.npy);;'
+                                                                     'dat(*.dat);;npz(*.npz)')
+        if fpath == '':
+            return
+        fmt = next(fmt for fmt in ['csv', 'json', 'pickle', 'txt', 'xls', 'npy', 'dat', 'npz']
+                   if ftype.find(f'*.{fmt}') > 0)
+
+        dialog = QProgressDialog('正在导出...', '取消', 0, self.data.shape[0], self)
+        dialog.setWindowTitle('导出')
+        dialog.setWindowModality(Qt.WindowModal)  # 导出时不能切换数据
+        dialog.setMinimumDuration(0)
+
+        self.export_worker = Worker(exportFile, self.data, fpath, fmt, time=self.exportStartTime(),
+                                    sampling_rate=self.sampling_rate)
+        self.export_worker.progress.connect(lambda done, total: dialog.setValue(done))
+        self.export_worker.result.connect(
+            lambda finished: self.statusBar().showMessage(f'已导出：{fpath}' if finished else '已取消导出'))
+        self.export_worker.error.connect(printError)
+        self.export_worker.finished.connect(dialog.close)
+        dialog.canceled.connect(self.export_worker.cancel)
+        self.export_worker.start()
+
+    def exportStartTime(self) -> np.array:
+        """
+        导出数据第一个采样点的GPS时间，用于 .dat 文件头
+        Returns: 6 个GPS时间值
+
+        """
+        start = gpsTimestamp(self.time[0])
+        if self.store is not None:  # self.time[0] 为读取范围所在的第一个文件
+            first = max(bisect_right(self.store.file_starts, self.store_samples.start) - 1, 0)
+            start += (self.store_samples.start - self.store.file_starts[first]) / self.sampling_rate
+        elif self.gps_window is not None:  # 与 Catalog.locate 相同的取整
+            start += max(math.ceil((self.gps_window[0] - start) * self.sampling_rate - 1e-6), 0) / self.sampling_rate
+        return gpsTime(start + (self.sampling_times_from_num - 1) / self.sampling_rate)
+
+    def changeImagePyramidMethod(self):
+        """
+        修改灰度图与热力图的降采样方式，并重新绘制灰度图
+        Returns:
 
-        if ftype.find('*.txt') > 0:  # txt以空格分隔
-            data.to_csv(fpath, sep=' ', index=False, header=False)
-        elif ftype.find('*.csv') > 0:  # csv以逗号分隔
-            data.to_csv(fpath, sep=',', index=False, header=False)
-        elif ftype.find('*.xls') > 0:  # xls以制表符分隔
-            data.to_csv(fpath, sep='\t', index=False, header=False)
-        elif ftype.find('*.json') > 0:
-            data.to_json(fpath, orient='values')
-        elif ftype.find('*.pickle') > 0:
-            data.to_pickle(fpath)
+        """
+        self.image_pyramid_method = 'rms' if self.image_pyramid_method == 'maxabs' else 'maxabs'
+        self.image_pyramid_method_action.setText(f'瀑布图降采样：{PYRAMID_METHODS[self.image_pyramid_method]}')
+        if getattr(self, 'data', None) is not None:
+            self.plotGrayScaleImage()
 
     def changeReadMode(self):
         """
@@ -986,6 +1518,439 @@ class MainWindow(QMainWindow):
         """
         self.read_mode_action.setText(f'读取模式：{"普通采集" if self.is_scouter else "scouter 采集"}')
         self.is_scouter = ~self.is_scouter
+        if hasattr(self, 'file_path'):
+            self.file_table_rows = None
+            self.updateFile()  # 文件头信息随读取模式改变
+
+    def changePrecision(self):
+        """
+        修改计算精度，已读取数据时按新精度重新读取
+        Returns:
+
+        """
+        self.dtype = np.float32 if self.dtype == np.float64 else np.float64
+        self.precision_action.setText(f'计算精度：{np.dtype(self.dtype).name}')
+        if getattr(self, 'origin_data', None) is None:
+            return
+
+        try:
+            self.reloadData()  # 完整重新读取，滑动窗口随之按新精度重建
+        except Exception as err:
+            printError(err)
+            return
+        self.initLocalParams()
+        self.updateDataRange()
+        self.updateDataParams()
+        self.updateImages()
+
+    def convertTileStore(self):
+        """
+        把当前文件夹中的所有文件按 GPS 时间排序后去趋势，转换为分块存储
+        Returns:
+
+        """
+        if not hasattr(self, 'file_path'):
+            printError('请先设置文件路径')
+            return
+        path = QFileDialog.getExistingDirectory(self, '选择分块存储文件夹', '')
+        if path == '':
+            return
+
+        self.updateFile(rescan=False)
+        infos = sorted([info for info in self.file_infos if info['valid']],
+                       key=lambda info: info['time'].tolist())
+        files = [os.path.join(self.file_path, info['name']) for info in infos]
+        if not files:
+            printError('当前文件夹中没有可转换的文件')
+            return
+        dialog = QProgressDialog('正在转换...', '取消', 0, len(files), self)
+        dialog.setWindowTitle('转换为分块存储')
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+
+        self.tile_store_worker = Worker(convertToTileStore, files, path, self.is_scouter, process=detrendData)
+        self.tile_store_worker.progress.connect(lambda done, total: dialog.setValue(done))
+        self.tile_store_worker.result.connect(
+            lambda store: self.statusBar().showMessage(
+                f'已将 {len(files)} 个文件转换为分块存储：{path}' if store is not None else '已取消转换'))
+        self.tile_store_worker.error.connect(printError)
+        self.tile_store_worker.finished.connect(dialog.close)
+        dialog.canceled.connect(self.tile_store_worker.cancel)
+        self.tile_store_worker.start()
+
+    def openTileStore(self):
+        """
+        打开分块存储，选择读取的时间范围
+        Returns:
+
+        """
+        path = QFileDialog.getExistingDirectory(self, '打开分块存储', '')
+        if path == '':
+            return
+        try:
+            store = TileStore(path)
+        except Exception as err:
+            printError(err)
+            return
+
+        dialog = Dialog()
+        dialog.setWindowTitle('读取范围（时间）')
+
+        from_label = Label('始')
+        self.store_from_line_edit = LineEditWithReg(digit=True)
+        self.store_from_line_edit.setText('0')
+        to_label = Label('止')
+        self.store_to_line_edit = LineEditWithReg(digit=True)
+        self.store_to_line_edit.setText(str(store.files[0]['sampling_times'] / store.sampling_rate))
+        self.store_to_line_edit.setToolTip(f'单位为秒，总时长 {store.sampling_times / store.sampling_rate}s')
+
+        btn = PushButton('确定')
+        btn.clicked.connect(lambda: self.openTileStoreRange(store))
+        btn.clicked.connect(dialog.close)
+
+        hbox = QHBoxLayout()
+        vbox = QVBoxLayout()
+        hbox.addWidget(from_label)
+        hbox.addWidget(self.store_from_line_edit)
+        hbox.addStretch(1)
+        hbox.addWidget(to_label)
+        hbox.addWidget(self.store_to_line_edit)
+        vbox.addLayout(hbox)
+        vbox.addWidget(btn)
+
+        dialog.setLayout(vbox)
+        dialog.exec_()
+
+    def openTileStoreRange(self, store: TileStore):
+        """
+        按设置的时间范围从分块存储读取数据并更新
+        Args:
+            store: 分块存储
+
+        Returns:
+
+        """
+        from_num = int(float(self.store_from_line_edit.text() or 0) * store.sampling_rate)
+        to_num = int(float(self.store_to_line_edit.text() or 0) * store.sampling_rate)
+        if from_num > to_num:
+            from_num, to_num = to_num, from_num
+        from_num, to_num = max(from_num, 0), min(to_num, store.sampling_times)
+        if from_num >= to_num:
+            printError('读取范围为空')
+            return
+
+        self.stopLiveTail()
+        self.store, self.store_samples, self.gps_window = store, slice(from_num, to_num), None
+        try:
+            self.readStore()
+        except Exception as err:
+            printError(err)
+            return
+        self.initLocalParams()
+        self.updateWidgetsState()
+        self.updateDataRange()
+        self.updateDataParams()
+        self.updateDataGPSTime()
+        self.updateImages()
+
+    def readStore(self):
+        """
+        从分块存储读取选中的通道与时间范围，只加载涉及的块
+        Returns:
+
+        """
+        store = self.store
+        if self.channel_to_num is None or not 1 <= self.channel_from_num <= self.channel_to_num <= store.channels_num:
+            self.channel_from_num, self.channel_to_num, self.channel_step_num = 1, store.channels_num, 1
+        channels = slice(self.channel_from_num - 1, self.channel_to_num, self.channel_step_num)
+        self.read_channels = channels
+
+        data = store.read(channels, self.store_samples).astype(self.dtype, copy=False)
+        if not store.manifest['processed']:
+            data = detrendData(data)
+        files = store.filesInRange(self.store_samples)
+
+        self.time = [np.array(f['time'], dtype=np.float32) for f in files]
+        self.file_names = [f['name'] for f in files]
+        self.ring_buffer = None
+        self.data = data
+        self.origin_data = self.data
+        self.sampling_rate = store.sampling_rate
+        self.channels_num = store.channels_num
+        self.sampling_times = self.data.shape[1]
+        self.acquisition_params = {
+            '分块存储': store.path,
+            'GPS时间': f'{formatGPSTime(self.time[0])} 至 {formatGPSTime(self.time[-1])}',
+            '采样频率': f'{self.sampling_rate}Hz',
+            '传感点数（通道数）': f'{self.channels_num}',
+            '读取范围': f'{self.store_samples.start / self.sampling_rate}s 至 '
+                        f'{self.store_samples.stop / self.sampling_rate}s',
+            '总采样点数': f'{self.sampling_times}'
+        }
+
+    def readGPSWindowDialog(self):
+        """
+        按GPS时间读取数据的对话框
+        Returns:
+
+        """
+        if not hasattr(self, 'file_path'):
+            printError('请先设置文件路径')
+            return
+        self.updateFile(rescan=False)
+        infos = [info for info in self.file_infos if info['valid'] and info['start'] is not None]
+        if not infos:
+            printError('当前文件夹中没有可读取的文件')
+            return
+        first = min(infos, key=lambda info: info['start'])
+
+        dialog = Dialog()
+        dialog.setWindowTitle('按GPS时间读取')
+
+        from_label = Label('始')
+        self.gps_window_from_line_edit = LineEdit()
+        self.gps_window_from_line_edit.setText(formatGPSTime(first['time']))
+        self.gps_window_from_line_edit.setToolTip('年-月-日-时-分-秒，秒可带小数')
+        to_label = Label('止')
+        self.gps_window_to_line_edit = LineEdit()
+        end = first['time'][:5].tolist() + [round(float(first['time'][5]) + first['sampling_time'], 6)]
+        self.gps_window_to_line_edit.setText(formatGPSTime(end))  # 默认读取最早的一个文件
+        self.gps_window_to_line_edit.setToolTip('年-月-日-时-分-秒，秒可带小数')
+
+        btn = PushButton('确定')
+        btn.clicked.connect(self.setGPSWindow)
+        btn.clicked.connect(dialog.close)
+
+        hbox = QHBoxLayout()
+        vbox = QVBoxLayout()
+        hbox.addWidget(from_label)
+        hbox.addWidget(self.gps_window_from_line_edit)
+        hbox.addStretch(1)
+        hbox.addWidget(to_label)
+        hbox.addWidget(self.gps_window_to_line_edit)
+        vbox.addLayout(hbox)
+        vbox.addWidget(btn)
+
+        dialog.setLayout(vbox)
+        dialog.exec_()
+
+    def setGPSWindow(self):
+        """
+        按设置的GPS时间范围读取数据并更新
+        Returns:
+
+        """
+        from_text, to_text = self.gps_window_from_line_edit.text(), self.gps_window_to_line_edit.text()
+        try:
+            start, stop = parseGPSTime(from_text), parseGPSTime(to_text)
+        except ValueError as err:
+            printError(err)
+            return
+        if start > stop:
+            start, stop, from_text, to_text = stop, start, to_text, from_text
+
+        self.stopLiveTail()
+        self.gps_window, self.gps_window_text = (start, stop), (from_text, to_text)
+        try:
+            self.readGPSWindow()
+        except Exception as err:
+            self.gps_window = None
+            printError(err)
+            return
+        self.initLocalParams()
+        self.updateWidgetsState()
+        self.updateDataRange()
+        self.updateDataParams()
+        self.updateDataGPSTime()
+        self.updateImages()
+
+    def readGPSWindow(self):
+        """
+        由索引中各文件的GPS时间确定覆盖时间范围的文件与采样点，只读取这些采样点，逐个文件去趋势
+        Returns:
+
+        """
+        start, stop = self.gps_window
+        segments = self.catalog.locate(start, stop, self.is_scouter)
+        if not segments:
+            raise ValueError('该时间范围内没有数据')
+
+        channels_num = segments[0][0]['channels_num']
+        if self.channel_to_num is None or not 1 <= self.channel_from_num <= self.channel_to_num <= channels_num:
+            self.channel_from_num, self.channel_to_num, self.channel_step_num = 1, channels_num, 1
+        channels = slice(self.channel_from_num - 1, self.channel_to_num, self.channel_step_num)
+        self.read_channels = channels
+
+        self.prefetcher.cancel()
+        readers, data = readSegments([(os.path.join(self.file_path, info['name']), samples)
+                                      for info, samples in segments],
+                                     self.is_scouter, channels, use_sidecar=self.scouter_cache, dtype=self.dtype,
+                                     process=detrendData)
+
+        self.store = None
+        self.time = [x.time for x in readers]
+        self.file_names = [info['name'] for info, _ in segments]
+        self.ring_buffer = None
+        self.data = data
+        self.origin_data = self.data
+        self.sampling_rate = readers[0].sampling_rate
+        self.channels_num = channels_num
+        self.sampling_times = self.data.shape[1]
+        self.acquisition_params = {
+            'GPS时间': f'{self.gps_window_text[0]} 至 {self.gps_window_text[1]}',
+            '文件': f'{self.file_names[0]} 至 {self.file_names[-1]}，共 {len(self.file_names)} 个',
+            '采样频率': f'{self.sampling_rate}Hz',
+            '传感点数（通道数）': f'{self.channels_num}',
+            '总采样点数': f'{self.sampling_times}'
+        }
+
+    def changeScouterCache(self):
+        """
+        修改是否使用 scouter 缓存
+        Returns:
+
+        """
+        self.scouter_cache = not self.scouter_cache
+        self.scouter_cache_action.setText(f'scouter 缓存（{"是" if self.scouter_cache else "否"}）')
+        if hasattr(self, 'file_path') and hasattr(self, 'file_names'):
+            self.convertScouterFiles([os.path.join(self.file_path, file) for file in self.file_names])
+
+    def convertScouterFiles(self, files: list):
+        """
+        scouter 模式且使用缓存时，在后台转换文件，只提交当前读取与预读的文件，不转换整个文件夹
+        Args:
+            files: 文件路径
+
+        Returns:
+
+        """
+        if self.is_scouter and self.scouter_cache:
+            if not self.scouter_converter:
+                self.scouter_converter = ScouterConverter()
+            self.scouter_converter.submit(files)
+
+    def changeLiveTail(self):
+        """
+        修改是否实时跟踪当前文件夹
+        Returns:
+
+        """
+        if self.live_tail:
+            self.stopLiveTail()
+            return
+        if not hasattr(self, 'file_path'):
+            printError('请先设置文件路径')
+            return
+        self.live_tail = True
+        self.live_tail_action.setText('实时跟踪（是）')
+        self.live_watcher = QFileSystemWatcher([self.file_path], self)
+        self.live_watcher.directoryChanged.connect(lambda: self.live_timer.start())  # 合并短时间内的多次变化
+        self.live_sizes = {}
+        self.updateFile()
+        # 尚未读取时，最新的若干个文件同样需等待写完再读取
+        number = max(self.files_read_number, 1)
+        self.live_pending = {info['name'] for info in heapq.nlargest(
+            number, [info for info in self.file_infos if info['valid']], key=lambda info: info['start'])}
+        self.checkLiveFiles()
+
+    def stopLiveTail(self):
+        """
+        停止实时跟踪
+        Returns:
+
+        """
+        if not self.live_tail:
+            return
+        self.live_tail = False
+        self.live_tail_action.setText('实时跟踪（否）')
+        self.live_timer.stop()
+        self.live_watcher.deleteLater()
+        self.live_watcher = None
+        self.file_timer.start()  # 跟踪期间只追加了新文件，停止后再同步一次被删除的文件
+
+    def checkLiveFiles(self):
+        """
+        查找比已显示的文件更新且已写完（两次检查之间大小不变）的文件，追加到滑动窗口并更新显示
+        窗口最多保留“文件读取数量”个文件，最早的文件被丢弃，内存占用不随运行时间增长
+        Returns:
+
+        """
+        if not self.live_tail:
+            return
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.live_timer.start()  # 导出的数据可能是滑动窗口的视图，导出完成后再追加
+            return
+        try:
+            with os.scandir(self.file_path) as entries:
+                names = [entry.name for entry in entries if entry.name.endswith('.dat') and entry.is_file()]
+        except OSError as err:
+            self.stopLiveTail()
+            printError(err)
+            return
+        # 只检查尚未显示在文件列表中的文件，以及开始跟踪时待读取的文件，不重新读取整个文件夹的文件头
+        pending = sorted(name for name in names if name not in self.file_table_names or name in self.live_pending)
+
+        sizes = {}
+        for name in pending:
+            try:
+                sizes[name] = os.path.getsize(os.path.join(self.file_path, name))
+            except OSError:
+                sizes[name] = None
+        finished = []
+        for name in pending:
+            if sizes[name] is None or self.live_sizes.get(name) != sizes[name]:
+                break  # 该文件可能仍在写入，它与之后的文件等下次检查
+            finished.append(name)
+        self.live_sizes = sizes
+        if len(finished) < len(pending):
+            self.live_timer.start()
+        if not finished:
+            return
+        new_infos = self.catalog.add(finished, self.is_scouter)  # 只读取写完的新文件的文件头
+        self.appendFileRows(new_infos)
+        self.live_pending.difference_update(finished)
+
+        loaded = getattr(self, 'ring_buffer', None) is not None and self.store is None and self.gps_window is None \
+            and self.loaded_key == (self.file_path, bool(self.is_scouter), self.read_channels)
+        number = max(self.files_read_number, 1)
+        if loaded:
+            last_start = gpsTimestamp(self.time[-1])
+            infos = sorted([info for info in new_infos if info['valid'] and info['start'] > last_start],
+                           key=lambda info: info['start'])
+        else:  # 尚未读取或数据未放入滑动窗口时，读取最新的若干个文件
+            infos = [info for info in self.file_infos if info['valid'] and info['name'] not in self.live_pending]
+            infos = heapq.nlargest(number, infos, key=lambda info: info['start'])[::-1]
+        ready = [info['name'] for info in infos][-number:]
+        if not ready:
+            return
+        self.convertScouterFiles([os.path.join(self.file_path, name) for name in ready])
+
+        try:
+            if not loaded or len(ready) >= number:
+                self.file_names = ready[-number:]
+                self.readData()
+                if self.ring_buffer is not None:  # 数据较大、按需读取时没有滑动窗口
+                    self.ring_buffer.maxlen = number  # 文件不足时继续追加，直到达到窗口文件数
+            else:
+                for name in ready:
+                    if not self.slideFile(name):
+                        raise ValueError(f'{name} 的采样率或通道数与已读取的数据不一致')
+        except Exception as err:
+            self.stopLiveTail()
+            printError(err)
+            return
+
+        if not loaded:
+            self.initLocalParams()
+            self.updateWidgetsState()
+        self.sampling_times_from_num, self.sampling_times_to_num = 1, self.sampling_times  # 始终显示整个窗口
+        self.updateDataRange()
+        self.updateDataParams()
+        self.updateDataGPSTime()
+        if loaded:
+            self.updateLiveImages()
+        else:
+            self.updateImages()
 
     def showAcquisitionParams(self):
         """
@@ -1093,12 +2058,13 @@ class MainWindow(QMainWindow):
         to_label = Label('止')
         self.channel_to = LineEditWithReg()
         self.channel_to.setText(str(self.channel_to_num))
+        step_label = Label('步长')
+        self.channel_step = LineEditWithReg()
+        self.channel_step.setText(str(self.channel_step_num))
+        self.channel_step.setToolTip('每隔多少个通道读取一个通道')
 
         btn = PushButton('确定')
         btn.clicked.connect(self.setChannelRange)
-        btn.clicked.connect(self.updateDataRange)
-        btn.clicked.connect(self.updateDataParams)
-        btn.clicked.connect(self.updateImages)
         btn.clicked.connect(dialog.close)
 
         vbox = QVBoxLayout()
@@ -1108,6 +2074,9 @@ class MainWindow(QMainWindow):
         hbox.addStretch(1)
         hbox.addWidget(to_label)
         hbox.addWidget(self.channel_to)
+        hbox.addStretch(1)
+        hbox.addWidget(step_label)
+        hbox.addWidget(self.channel_step)
 
         vbox.addLayout(hbox)
         vbox.addWidget(btn)
@@ -1117,21 +2086,32 @@ class MainWindow(QMainWindow):
 
     def setChannelRange(self):
         """
-        以通道数截取
+        以通道数截取，只从磁盘重新读取选中的通道，读取成功后更新显示
         Returns:
 
         """
-        from_num, to_num = int(self.channel_from.text()), int(self.channel_to.text())
-
-        if 1 <= from_num < self.origin_data.shape[0] and 1 < to_num <= self.origin_data.shape[0]:
-            if from_num > to_num:
-                from_num, to_num = to_num, from_num
-        elif from_num == 0 and 1 < to_num <= self.origin_data.shape[0]:
-            from_num = 1
-        else:
-            from_num, to_num = 1, self.origin_data.shape[0]
+        previous = self.channel_from_num, self.channel_to_num, self.channel_step_num
+        try:
+            from_num, to_num = int(self.channel_from.text()), int(self.channel_to.text())
+            step_num = max(int(self.channel_step.text() or 1), 1)
 
-        self.channel_from_num, self.channel_to_num = from_num, to_num
+            if 1 <= from_num < self.channels_num and 1 < to_num <= self.channels_num:
+                if from_num > to_num:
+                    from_num, to_num = to_num, from_num
+            elif from_num == 0 and 1 < to_num <= self.channels_num:
+                from_num = 1
+            else:
+                from_num, to_num = 1, self.channels_num
+
+            self.channel_from_num, self.channel_to_num, self.channel_step_num = from_num, to_num, step_num
+            self.reloadData()
+        except Exception as err:
+            self.channel_from_num, self.channel_to_num, self.channel_step_num = previous  # 读取失败时保留原通道范围
+            printError(err)
+            return
+        self.updateDataRange()
+        self.updateDataParams()
+        self.updateImages()
 
     # """------------------------------------------------------------------------------------------------------------"""
     """更改读取通道号步长、读取文件数调用的函数"""
@@ -1215,6 +2195,54 @@ class MainWindow(QMainWindow):
         """
         self.files_read_number = int(self.files_read_number_line_edit.text())
 
+    def changeCacheSizeDialog(self):
+        """
+        设置已读取文件缓存的内存上限
+        Returns:
+
+        """
+        dialog = Dialog()
+        dialog.setFixedWidth(400)
+        dialog.setWindowTitle('设置缓存大小')
+
+        cache_size_label = Label('缓存大小（MB）')
+        self.cache_size_line_edit = LineEditWithReg()
+        self.cache_size_line_edit.setToolTip('已读取文件缓存的内存上限，为 0 时不缓存')
+        self.cache_size_line_edit.setText(str(self.decode_cache.max_bytes // 1024 ** 2))
+
+        memory_budget_label = Label('读入内存上限（MB）')
+        self.memory_budget_line_edit = LineEditWithReg()
+        self.memory_budget_line_edit.setToolTip('选中文件的数据超过该大小时不整体读入，只在使用时读取用到的部分')
+        self.memory_budget_line_edit.setText(str(self.memory_budget // 1024 ** 2))
+
+        btn = PushButton('确定')
+        btn.clicked.connect(self.updateCacheSize)
+        btn.clicked.connect(dialog.close)
+
+        vbox = QVBoxLayout()
+        hbox = QHBoxLayout()
+        hbox.addWidget(cache_size_label)
+        hbox.addWidget(self.cache_size_line_edit)
+        hbox1 = QHBoxLayout()
+        hbox1.addWidget(memory_budget_label)
+        hbox1.addWidget(self.memory_budget_line_edit)
+        vbox.addLayout(hbox)
+        vbox.addLayout(hbox1)
+        vbox.addSpacing(5)
+        vbox.addWidget(btn)
+
+        dialog.setLayout(vbox)
+        dialog.exec_()
+
+    def updateCacheSize(self):
+        """
+        更新缓存内存上限与读入内存上限
+        Returns:
+
+        """
+        self.decode_cache.setMaxBytes(int(self.cache_size_line_edit.text()) * 1024 ** 2)
+        self.memory_budget = int(self.memory_budget_line_edit.text()) * 1024 ** 2
+
     # """------------------------------------------------------------------------------------------------------------"""
     """绘制热力图调用函数"""
 
@@ -1226,16 +2254,7 @@ class MainWindow(QMainWindow):
         """
         plot_widget = MyPlotWidget('热力图', '时间（s）', '通道', check_mouse=False)
         self.tab_widget.addTab(plot_widget, '热力图')
-
-        tr = QTransform()
-        tr.scale(1 / self.sampling_rate, 1)  # 缩放
-        tr.translate(self.sampling_times_from_num, 0)  # 移动
-
-        item = pg.ImageItem()
-        item.setColorMap('viridis')
-        item.setImage(self.data.T)
-        item.setTransform(tr)
-        plot_widget.addItem(item)
+        self.drawImage(plot_widget, self.sampling_times_from_num, 'viridis')
 
     # """------------------------------------------------------------------------------------------------------------"""
     """绘制二值图调用函数"""
@@ -1248,7 +2267,7 @@ class MainWindow(QMainWindow):
         """
         if not self.binary_image:
             self.binary_image = BinaryImageHandler()
-        data = self.binary_image.run(self.data)
+        data = self.binary_image.run(np.asarray(self.data))
 
         if data is not None:
             plot_widget = MyPlotWidget('二值图', '时间（s）', '通道', check_mouse=False)
@@ -1273,7 +2292,7 @@ class MainWindow(QMainWindow):
 
         """
         feature_name = self.plot_menu.sender().text()
-        feature = FeatureCalculator(feature_name, self.data, self.sampling_rate).run()
+        feature = FeatureCalculator(feature_name, np.asarray(self.data), self.sampling_rate).run()
 
         plot_widget = MyPlotWidget(feature_name + '图', '通道', '')
         x = xAxis(self.current_channels, 1, self.current_channels)
@@ -1294,9 +2313,9 @@ class MainWindow(QMainWindow):
                   self.sampling_times_from_num,
                   self.sampling_times_to_num,
                   self.sampling_rate)
-        colors = cycle(['red', 'lime', 'deepskyblue', 'yellow', 'plum', 'gold', 'blue', 'fuchsia', 'aqua', 'orange'])
-        for i in range(1, self.current_channels + 1):
-            plot_widget.draw(x, self.data[i - 1] + i, pen=QColor(next(colors)))  # 根据通道数个位选择颜色绘图
+        colors = ['red', 'lime', 'deepskyblue', 'yellow', 'plum', 'gold', 'blue', 'fuchsia', 'aqua', 'orange']
+        offsets = np.arange(1, self.current_channels + 1)
+        plot_widget.drawTraces(x, self.data, offsets, colors)  # 根据通道数个位选择颜色绘图，惰性数组由金字塔分块读取
         self.tab_widget.addTab(plot_widget, '多通道云图')
 
     # """------------------------------------------------------------------------------------------------------------"""
@@ -4,17 +4,19 @@
 @Author  : zxy
 @File    : widget.py
 """
-from typing import Callable, Union, Tuple
+from typing import Callable, List, Optional, Union, Tuple
 
 import numpy as np
 import pyqtgraph as pg
-from scipy.spatial.distance import euclidean
 
-from PyQt5.QtCore import QRegExp, Qt
-from PyQt5.QtGui import QRegExpValidator, QFont, QColor
+from PyQt5.QtCore import QRegExp, Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QRegExpValidator, QFont, QColor, QTransform
 from PyQt5.QtWidgets import QLineEdit, QLabel, QComboBox, QCheckBox, QPushButton, QRadioButton, QSpinBox, QMenu, \
     QAction, QWidget, QTextEdit, QDialog
 
+from utils.classes.decimation import MinMaxPyramid
+from utils.classes.image_pyramid import ImagePyramid
+
 
 class Menu(QMenu):
     def __init__(self,
@@ -50,6 +52,35 @@ class Dialog(QDialog):
         self.setWindowFlags(Qt.WindowMinMaxButtonsHint | Qt.WindowCloseButtonHint)
 
 
+class Worker(QThread):
+    """在后台线程中运行函数，函数需接受 progress 与 cancelled 回调"""
+    progress = pyqtSignal(int, int)  # 已完成量，总量
+    result = pyqtSignal(object)  # 函数返回值
+    error = pyqtSignal(str)  # 函数抛出的错误
+
+    def __init__(self, func: Callable, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_requested = False
+
+    def run(self) -> None:
+        try:
+            ret = self.func(*self.args, progress=self.progress.emit, cancelled=self.isCancelled, **self.kwargs)
+        except Exception as err:
+            self.error.emit(str(err))
+        else:
+            self.result.emit(ret)
+
+    def cancel(self) -> None:
+        """请求取消，由函数在下次检查时停止"""
+        self.cancel_requested = True
+
+    def isCancelled(self) -> bool:
+        return self.cancel_requested
+
+
 class Label(QLabel):
     def __init__(self, text: str):
         super().__init__(text)
@@ -197,11 +228,15 @@ class SpinBox(QSpinBox):
 
 
 class MyPlotWidget(pg.PlotWidget):
-    """带字体、可显示数据"""
+    """带字体、可显示数据，点数较多的曲线按视图范围抽取后绘制"""
+    decimation_points = 20000  # 超过该点数的曲线使用最小值/最大值金字塔抽取
+    cursor_pixels = 20  # 数据标签查找鼠标左右多少像素内的点
 
     def __init__(self, title: str, xlabel: str, ylabel: str, grid: bool = False, check_mouse: bool = True):
         super().__init__()
         self.check_mouse = check_mouse
+        self.pyramids = {}  # 抽取绘制的曲线及其金字塔
+        self.trace_batches = []  # 批量绘制的多条曲线：（各颜色的曲线，金字塔，各颜色的行，各行的偏移）
         self.setTitle(f'<font face="Microsoft YaHei" size="5">{title}</font>')
         self.setLabel('bottom', f'<font face="Microsoft YaHei" size="3">{xlabel}</font>')
         self.setLabel('left', f'<font face="Microsoft YaHei" size="3">{ylabel}</font>')
@@ -211,6 +246,94 @@ class MyPlotWidget(pg.PlotWidget):
         if check_mouse:
             self.initPlotItem(title, xlabel, ylabel, grid)
         self.sig_mouse_moved_connected = False
+        self.currentPlotItem().vb.sigXRangeChanged.connect(self.updateDecimation)
+        self.currentPlotItem().vb.sigResized.connect(self.updateDecimation)
+
+    def currentPlotItem(self) -> pg.PlotItem:
+        """绘图所用的plotitem"""
+        return self.plot_item if self.check_mouse else self.getPlotItem()
+
+    def decimate(self, args: tuple) -> Tuple[tuple, Optional[MinMaxPyramid]]:
+        """
+        点数较多时建立曲线的金字塔，返回当前视图下抽取后的数据，否则原样返回
+        Args:
+            args: 绘图参数 (y,) 或 (x, y)
+
+        Returns: 绘图参数，金字塔，未抽取时为 None
+
+        """
+        if len(args) not in (1, 2) or np.ndim(args[-1]) != 1 or len(args[-1]) <= self.decimation_points:
+            return args, None
+        y = np.asarray(args[-1])
+        x = np.arange(len(y)) if len(args) == 1 else np.asarray(args[0])
+        if len(x) != len(y) or x[0] > x[-1]:  # 横坐标应单调递增
+            return args, None
+        pyramid = MinMaxPyramid(x, y)
+        return pyramid.view(*self.viewXRange()), pyramid
+
+    def viewXRange(self) -> Tuple[float, float, int]:
+        """
+        可见的横坐标范围与像素宽度，尚未显示时宽度取 1000
+        Returns: 横坐标起点，终点，像素宽度
+
+        """
+        vb = self.currentPlotItem().vb
+        x0, x1 = vb.viewRange()[0]
+        width = int(vb.width())
+        return x0, x1, width if width > 1 else 1000
+
+    def updateDecimation(self, *args) -> None:
+        """视图范围或大小改变后，按新的范围重新抽取各曲线"""
+        items = self.currentPlotItem().items
+        for plot_data_item, pyramid in list(self.pyramids.items()):
+            if plot_data_item not in items:  # 已被清除
+                del self.pyramids[plot_data_item]
+                continue
+            plot_data_item.setData(*pyramid.view(*self.viewXRange()))
+        self.trace_batches = [batch for batch in self.trace_batches if batch[0][0] in items]
+        for batch in self.trace_batches:
+            self.setTraces(*batch)
+
+    def drawTraces(self, x: np.array, data: np.array, offsets: np.array, colors: List[str]) -> None:
+        """
+        把多条共用横坐标的曲线按颜色合并为少数几条曲线绘制，第 i 条曲线使用 colors[i % len(colors)]
+        各曲线首尾之间不连线，点数较多时与 draw 相同按视图范围抽取
+        Args:
+            x: 单调递增的横坐标
+            data: （曲线数，采样点数）纵坐标，可以是惰性数组
+            offsets: 各曲线的纵向偏移
+            colors: 颜色
+
+        Returns:
+
+        """
+        plot_item = self.currentPlotItem()
+        pyramid = MinMaxPyramid(x, data)
+        rows = [np.arange(i, len(data), len(colors)) for i in range(min(len(colors), len(data)))]
+        items = [plot_item.plot(pen=QColor(color), skipFiniteCheck=True) for color, _ in zip(colors, rows)]
+        batch = (items, pyramid, rows, np.asarray(offsets, dtype=data.dtype)[:, None])
+        self.trace_batches.append(batch)
+        self.setTraces(*batch)
+
+    def setTraces(self, items: List[pg.PlotDataItem], pyramid: MinMaxPyramid, rows: List[np.array],
+                  offsets: np.array) -> None:
+        """
+        按当前视图抽取批量绘制的曲线并更新各颜色的曲线
+        Args:
+            items: 各颜色的曲线
+            pyramid: 所有曲线的金字塔
+            rows: 各颜色的曲线包含的行
+            offsets: （曲线数，1）纵向偏移
+
+        Returns:
+
+        """
+        x, y = pyramid.view(*self.viewXRange())
+        y = y + offsets  # 一次加上所有曲线的偏移
+        connect = np.ones(len(x), dtype=bool)
+        connect[-1] = False  # 每条曲线的最后一点不与下一条曲线相连
+        for item, index in zip(items, rows):
+            item.setData(np.tile(x, len(index)), y[index].ravel(), connect=np.tile(connect, len(index)))
 
     def initPlotItem(self, title: str, xlabel: str, ylabel: str, grid: bool) -> None:
         """初始化一个plotitem"""
@@ -226,64 +349,247 @@ class MyPlotWidget(pg.PlotWidget):
         self.setCentralItem(self.plot_item)
 
     def updateAxesRange(self):
-        """更新xy轴范围"""
-        self.data = np.nan_to_num(np.array(self.plot_data_item.getData()))  # 获取绘图数据，并把其中可能存在的nan值替换为0
-        self.xmin, self.xmax = np.min(self.data[0]), np.max(self.data[0])
-        self.ymin, self.ymax = np.min(self.data[1]), np.max(self.data[1])
+        """
+        缓存曲线数据的引用、范围以及 x 是否有序，并更新xy轴范围，数据标签也使用这些缓存
+        抽取绘制时使用金字塔中的完整数据与最粗一层的范围，不复制数据
+        """
+        pyramid = self.pyramids.get(self.plot_data_item)
+        if pyramid is not None:
+            self.data = (pyramid.x, pyramid.y)
+            self.x_sorted = True  # 金字塔要求 x 单调递增
+            self.xmin, self.xmax, self.ymin, self.ymax = pyramid.bounds()
+        else:
+            x, y = self.data = self.plot_data_item.getData()  # 曲线保存的数据，不是副本
+            self.x_sorted = bool(np.all(x[1:] >= x[:-1]))  # x 有序时数据标签可二分查找
+            xmin, xmax = (x[0], x[-1]) if self.x_sorted else (np.fmin.reduce(x), np.fmax.reduce(x))  # 忽略 nan
+            ymin, ymax = np.fmin.reduce(y), np.fmax.reduce(y)
+            # 转为 Python float，float32 标量直接传给 pyqtgraph 会在计算范围时溢出
+            self.xmin, self.xmax, self.ymin, self.ymax = float(xmin), float(xmax), float(ymin), float(ymax)
+        if not np.isfinite([self.xmin, self.xmax, self.ymin, self.ymax]).all():  # 全部为 nan 或含 inf
+            self.xmin, self.xmax, self.ymin, self.ymax = \
+                map(float, np.nan_to_num([self.xmin, self.xmax, self.ymin, self.ymax]))
         self.plot_item.setXRange(self.xmin, self.xmax)
         self.plot_item.setYRange(self.ymin, self.ymax)
 
     def draw(self, *args, **kwargs) -> None:
         """让plotwidget中的plotitem绘图"""
+        args, pyramid = self.decimate(args)
         if self.check_mouse:
             self.plot_data_item = self.plot_item.plot(*args, **kwargs)
+            plot_data_item = self.plot_data_item
+        else:
+            plot_data_item = self.plot(*args, **kwargs)
+        if pyramid is not None:
+            self.pyramids[plot_data_item] = pyramid
+        if self.check_mouse:
             self.updateAxesRange()
             if not self.sig_mouse_moved_connected:
-                self.plot_item.scene().sigMouseMoved.connect(self.mouseMoved)  # 绘图之后绑定槽函数，否则会导致scene快速移动
+                # 绘图之后绑定槽函数，否则会导致scene快速移动；限制每秒最多处理 60 次
+                self.mouse_proxy = pg.SignalProxy(self.plot_item.scene().sigMouseMoved, rateLimit=60,
+                                                  slot=self.mouseMoved)
                 self.sig_mouse_moved_connected = True
-        else:
-            self.plot(*args, **kwargs)
 
-    def mouseMoved(self, pos: Tuple) -> None:
-        """鼠标移动槽函数"""
-        if hasattr(self, 'text_item'):
-            self.plot_item.removeItem(self.text_item)
-            self.plot_item.removeItem(self.vertical_line)
-            self.plot_item.removeItem(self.horizontal_line)
-            self.plot_item.removeItem(self.scatter_plot_item)
+    def updatePlot(self, *args, **kwargs) -> None:
+        """更新已绘制曲线的数据，不重新创建曲线，尚未绘制时直接绘制"""
+        plot_data_item = getattr(self, 'plot_data_item', None)
+        if self.check_mouse and plot_data_item is not None and plot_data_item in self.plot_item.items:
+            self.pyramids.pop(plot_data_item, None)
+            args, pyramid = self.decimate(args)
+            plot_data_item.setData(*args, **kwargs)
+            if pyramid is not None:
+                self.pyramids[plot_data_item] = pyramid
+            self.updateAxesRange()
+        else:
+            self.draw(*args, **kwargs)
 
+    def initCursor(self) -> None:
+        """创建数据标签、十字线与数据点，之后鼠标移动时只改变位置"""
         # 数据标签
         self.text_item = pg.TextItem(color=QColor('black'), border=pg.mkPen(QColor('black')),
                                      fill=pg.mkBrush(QColor('yellow')))
         self.text_item.setFont(QFont('Times New Roman', 10))
-        self.plot_item.addItem(self.text_item)
 
         # 十字线
         self.vertical_line = pg.InfiniteLine(angle=90, pen=pg.mkPen('black', width=0.5, style=Qt.DashLine),
                                              movable=False)
         self.horizontal_line = pg.InfiniteLine(angle=0, pen=pg.mkPen('black', width=0.5, style=Qt.DashLine),
                                                movable=False)
-        self.plot_item.addItem(self.vertical_line, ignoreBounds=True)
-        self.plot_item.addItem(self.horizontal_line, ignoreBounds=True)
 
         # 数据点
-        self.scatter_plot_item = pg.ScatterPlotItem()
-        self.plot_item.addItem(self.scatter_plot_item)
+        self.scatter_plot_item = pg.ScatterPlotItem(size=10, pen=QColor('red'))
+
+    def mouseMoved(self, event: Tuple) -> None:
+        """鼠标移动槽函数，由 SignalProxy 限制频率，参数为（鼠标位置，）"""
+        pos = event[0]
+        if not hasattr(self, 'text_item'):
+            self.initCursor()
+        for item in [self.text_item, self.vertical_line, self.horizontal_line, self.scatter_plot_item]:
+            if item not in self.plot_item.items:  # 清空绘图后重新添加
+                self.plot_item.addItem(item, ignoreBounds=isinstance(item, pg.InfiniteLine))
 
         # 设置各item位置
+        visible = False
         vb = self.plot_item.vb
         if self.plot_item.sceneBoundingRect().contains(pos):
             mouse_point = vb.mapSceneToView(pos)
             x, y = float(mouse_point.x()), float(mouse_point.y())
             if self.xmin <= x <= self.xmax and self.ymin <= y <= self.ymax:
                 index = self.searchPointIndex(x, y)
-                self.scatter_plot_item.setData(pos=[[self.data[0][index], self.data[1][index]]], size=10,
-                                               pen=QColor('red'))
-                self.text_item.setText(f'x: {self.data[0][index]}\ny: {self.data[1][index]}')
-                self.text_item.setPos(self.data[0][index], self.data[1][index])
-                self.vertical_line.setPos(self.data[0][index])
-                self.horizontal_line.setPos(self.data[1][index])
+                x, y = self.data[0][index], self.data[1][index]
+                self.scatter_plot_item.setData(pos=[[x, y]])
+                self.text_item.setText(f'x: {x}\ny: {y}')
+                self.text_item.setPos(x, y)
+                self.vertical_line.setPos(x)
+                self.horizontal_line.setPos(y)
+                visible = True
+        for item in [self.text_item, self.vertical_line, self.horizontal_line, self.scatter_plot_item]:
+            item.setVisible(visible)
 
     def searchPointIndex(self, xpos: float, ypos: float) -> int:
-        """寻找x坐标附近的点，返回该点的索引"""
-        return np.argmin([euclidean((xpos, ypos), (x, y)) for x, y in zip(*self.data)])
\ No newline at end of file
+        """
+        寻找屏幕上离鼠标最近的点，x 有序时先二分查找，只比较鼠标左右 cursor_pixels 个像素内的点
+        Args:
+            xpos: 鼠标的 x 坐标
+            ypos: 鼠标的 y 坐标
+
+        Returns: 该点的索引
+
+        """
+        x, y = self.data
+        x_pixel, y_pixel = self.plot_item.vb.viewPixelSize()  # 每个像素对应的坐标长度
+        start, stop = 0, len(x)
+        if self.x_sorted:
+            dx = self.cursor_pixels * x_pixel
+            start, stop = np.searchsorted(x, xpos - dx, side='left'), np.searchsorted(x, xpos + dx, side='right')
+            if start >= stop:  # 附近没有点时比较 x 坐标两侧最近的点
+                i = np.searchsorted(x, xpos)
+                start, stop = max(i - 1, 0), min(i + 1, len(x))
+        distance = ((x[start:stop] - xpos) / x_pixel) ** 2 + ((y[start:stop] - ypos) / y_pixel) ** 2  # 屏幕上的距离
+        return start + int(np.argmin(np.nan_to_num(distance, nan=np.inf)))  # 不选择 nan 点
+
+
+class TiledImage:
+    """在plotitem中按视图范围与分辨率只显示可见的 ImagePyramid 图块，平移时只新建进入视图的图块"""
+
+    def __init__(self,
+                 plot_item: pg.PlotItem,
+                 pyramid: ImagePyramid,
+                 x_scale: float = 1.,
+                 x_offset: float = 0.,
+                 colormap: Optional[str] = None):
+        """
+        第 c 个采样点位于横坐标 (c + x_offset) * x_scale 处，第 r 个通道位于纵坐标 r 处
+        Args:
+            plot_item: 显示的plotitem
+            pyramid: 已建立的图像金字塔
+            x_scale: 每个采样点的横坐标宽度
+            x_offset: 采样点序号的偏移
+            colormap: 颜色映射名称，默认为灰度
+
+        """
+        self.plot_item = plot_item
+        self.pyramid = pyramid
+        self.x_scale, self.x_offset = x_scale, x_offset
+        self.colormap = colormap
+        self.items = {}  # 显示中的图块，键为（层，行号，列号）
+        self.plot_item.vb.sigRangeChanged.connect(self.updateTiles)
+        self.plot_item.vb.sigResized.connect(self.updateTiles)
+        self.updateTiles()
+
+    def updateTiles(self, *args) -> None:
+        """按当前视图选择层，新建可见而尚未显示的图块，移除不再可见的图块"""
+        vb = self.plot_item.vb
+        (x0, x1), (y0, y1) = vb.viewRange()
+        rows = (max(y0, 0), min(y1, self.pyramid.shape[0]))
+        cols = (max(x0 / self.x_scale - self.x_offset, 0),
+                min(x1 / self.x_scale - self.x_offset, self.pyramid.shape[1]))
+        width, height = max(vb.width(), 1), max(vb.height(), 1)
+        level = self.pyramid.chooseLevel((y1 - y0) / height, (x1 - x0) / self.x_scale / width)
+        keys = {(level, i, j) for i, j in self.pyramid.visibleTiles(level, rows, cols)}
+
+        for key in set(self.items) - keys:
+            self.plot_item.removeItem(self.items.pop(key))
+        for key in keys - set(self.items):
+            (kr, kc), i, j = key
+            item = pg.ImageItem()
+            if self.colormap is not None:
+                item.setColorMap(self.colormap)
+            item.setImage(self.pyramid.tileData((kr, kc), i, j).T, levels=self.pyramid.range)  # 所有图块使用同一色阶
+            tr = QTransform()
+            tr.scale(self.x_scale * (1 << kc), 1 << kr)  # 每个单元覆盖 2^kc 个采样点与 2^kr 个通道
+            tr.translate(self.x_offset / (1 << kc) + j * self.pyramid.tile, i * self.pyramid.tile)
+            item.setTransform(tr)
+            self.plot_item.addItem(item)
+            self.items[key] = item
+
+    def clear(self) -> None:
+        """移除所有图块并停止跟随视图"""
+        self.plot_item.vb.sigRangeChanged.disconnect(self.updateTiles)
+        self.plot_item.vb.sigResized.disconnect(self.updateTiles)
+        for item in self.items.values():
+            self.plot_item.removeItem(item)
+        self.items = {}
+
+
+class TimeFrequencyWidget(MyPlotWidget):
+    """以图像显示时频谱、小波尺度图等时频矩阵，可交互缩放，带色标，缩小时图像按屏幕分辨率自动降采样"""
+
+    def __init__(self, title: str, label: str = '', colormap: str = 'viridis'):
+        """
+        Args:
+            title: 标题
+            label: 色标标签（单位）
+            colormap: 颜色映射名称
+
+        """
+        super().__init__(title, '时间（s）', '频率（Hz）', check_mouse=False)
+        self.image_item = pg.ImageItem(axisOrder='row-major')  # 矩阵的行为频率，直接使用，不转置
+        self.image_item.setAutoDownsample(True)
+        self.addItem(self.image_item)
+        self.color_bar = pg.ColorBarItem(colorMap=colormap, label=label)
+        self.color_bar.setImageItem(self.image_item, insert_in=self.getPlotItem())
+
+    @staticmethod
+    def axisRect(axis: np.array) -> Tuple[float, float]:
+        """
+        等间隔的坐标轴上各单元的范围，每个坐标点位于单元中心
+        Args:
+            axis: 坐标轴，单调递增
+
+        Returns: 起点，宽度
+
+        """
+        step = (axis[-1] - axis[0]) / (len(axis) - 1) if len(axis) > 1 else 1.
+        return float(axis[0] - step / 2), float(step * len(axis))
+
+    def setMatrix(self,
+                  t: np.array,
+                  fs: np.array,
+                  data: np.array,
+                  x_range: Optional[Tuple[float, float]] = None,
+                  y_range: Optional[Tuple[float, float]] = None) -> None:
+        """
+        显示时频矩阵，矩阵直接作为图像数据，不构建网格；时间与频率轴应为等间隔
+        Args:
+            t: 时间轴
+            fs: 频率轴，递减时翻转矩阵的行
+            data: （频率数，时间数）矩阵
+            x_range: 显示的时间范围，默认为整个时间轴
+            y_range: 显示的频率范围，默认为整个频率轴
+
+        Returns:
+
+        """
+        if len(fs) > 1 and fs[0] > fs[-1]:
+            fs, data = fs[::-1], data[::-1]
+        low, high = (np.nanmin(data), np.nanmax(data)) if not np.isnan(data).all() else (0., 1.)
+        if not np.isfinite([low, high]).all() or low == high:  # 含 inf 或为常数
+            low, high = np.nan_to_num([low, high])
+            high = high if high > low else low + 1.
+        x0, width = self.axisRect(t)
+        y0, height = self.axisRect(fs)
+        self.image_item.setImage(data, autoLevels=False)
+        self.image_item.setRect(x0, y0, width, height)
+        self.color_bar.setLevels((float(low), float(high)))
+        self.setXRange(*(x_range or (x0, x0 + width)), padding=0)
+        self.setYRange(*(y_range or (y0, y0 + height)), padding=0)